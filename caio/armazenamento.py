@@ -0,0 +1,902 @@
+# armazenamento.py
+# Persistência dos perfis (snapshot em CSV + journal de alterações, append-only,
+# ou SQLite normalizado) e dos grupos/notificações (SQLite)
+
+import contextlib
+import csv
+import io
+import json
+import mmap
+import os
+import sqlite3
+import struct
+import time
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+CABECALHO = ["ra", "nome", "email", "materias", "amigos", "grupos", "versao"]
+LIMITE_JOURNAL = 500
+
+OP_SALVAR = "U"
+OP_REMOVER = "D"
+
+_OFFSET = struct.Struct(">Q")
+# No Windows um arquivo aberto ou mapeado por um processo impede o os.replace de outro
+# (compactação, reconstrução do .idx): lá o snapshot e o índice só ficam abertos durante
+# cada leitura, com a trava
+_MANTER_SNAPSHOT_ABERTO = fcntl is not None
+# Espera entre tentativas de pegar a trava no Windows
+_ESPERA_TRAVA = 0.01
+_VERSAO = CABECALHO.index("versao")
+_GRUPOS = CABECALHO.index("grupos")
+
+
+def perfil_para_linha(u):
+    return [
+        u.ra,
+        u.nome,
+        u.email,
+        ";".join(u.materias_interesse),
+        ";".join(u.amigos),
+        u.grupos_participados,
+        u.versao
+    ]
+
+
+def _normalizar(row):
+    # Arquivos anteriores à coluna "versao" são lidos como versão 0
+    return row + ["0"] * (len(CABECALHO) - len(row))
+
+
+def linha_valida(linha):
+    # Campos numéricos precisam ser inteiros: um registro cortado logo após a última
+    # vírgula tem o número certo de campos, mas a versão vazia
+    try:
+        int(linha[_GRUPOS])
+        int(linha[_VERSAO])
+    except ValueError:
+        return False
+    return True
+
+
+def mesclar_linhas(base, nossa, deles):
+    # Merge de 3 vias: campos simples ficam com a nossa versão se os alteramos;
+    # listas (matérias e amigos) recebem nossas inclusões e remoções sobre as deles
+    resultado = list(deles)
+    for i in (1, 2, 5):
+        if base is None or str(nossa[i]) != base[i]:
+            resultado[i] = nossa[i]
+    for i in (3, 4):
+        anterior = set(base[i].split(";")) if base and base[i] else set()
+        nossos = nossa[i].split(";") if nossa[i] else []
+        removidos = anterior - set(nossos)
+        lista = [x for x in (deles[i].split(";") if deles[i] else []) if x not in removidos]
+        presentes = set(lista)
+        for x in nossos:
+            if x not in anterior and x not in presentes:
+                lista.append(x)
+                presentes.add(x)
+        resultado[i] = ";".join(lista)
+    return resultado
+
+
+class Armazenamento:
+    # Interface usada pelo Sistema. Linhas são listas de strings na ordem de CABECALHO.
+    #   carregar()                 -> todas as linhas (carga completa)
+    #   abrir()                    -> prepara leituras sob demanda (modo preguiçoso)
+    #   ler(ra)                    -> linha do RA ou None
+    #   gravar(alterados, removidos, todos, aplicar) -> persiste um lote; `aplicar`
+    #       recebe {ra: linha ou None} gravado por outros processos (modo concorrente)
+    # Consultas do modo preguiçoso, sem materializar perfis:
+    #   contar_materias(materias)  -> {ra: quantas das matérias o perfil tem}
+    #   amigos_de(ras)             -> {ra: [amigos]} dos RAs que existem
+    concorrente = False
+
+    def _resolver_conflitos(self, alterados, removidos, aplicar):
+        externos = self._sincronizar()
+        nossos = {u.ra: u for u in alterados}
+        atualizacoes = {}
+        for ra, linha in externos.items():
+            if ra in removidos:
+                continue
+            u = nossos.get(ra)
+            if u is None:
+                atualizacoes[ra] = linha
+                if linha is not None:
+                    self._bases[ra] = linha
+            elif linha is not None and int(linha[_VERSAO]) != u.versao:
+                # Conflito: alguém gravou este RA depois da versão em que nos baseamos
+                atualizacoes[ra] = mesclar_linhas(self._bases.get(ra), perfil_para_linha(u), linha)
+                self._bases[ra] = linha
+        if atualizacoes and aplicar:
+            aplicar(atualizacoes)
+
+
+class ArmazenamentoCSV(Armazenamento):
+    def __init__(self, arquivo, journal=True, limite_journal=LIMITE_JOURNAL, preguicoso=False,
+                 concorrente=False):
+        self.arquivo = arquivo
+        base = os.path.splitext(arquivo)[0]
+        self.arquivo_journal = base + ".log"
+        self.arquivo_indice = base + ".idx"
+        self.arquivo_trava = base + ".lock"
+        self.journal = journal
+        self.limite_journal = limite_journal
+        self.registros_journal = 0
+        # Modo preguiçoso: só o índice RA -> offset fica em memória; linhas são lidas sob demanda
+        self.preguicoso = preguicoso
+        self._offsets = None
+        self._snapshot = None
+        self._linhas_journal = {}
+        self._removidos = set()
+        # Modo concorrente: vários processos no mesmo arquivo, com trava consultiva,
+        # versão por registro e merge das listas quando há conflito
+        self.concorrente = concorrente
+        self._bases = {}
+        self._posicao_journal = 0
+        self._assinatura_snapshot = None
+        self._carregado = False
+        self._nivel_trava = 0
+        # {ra: linha ou None} de uma troca de snapshot percebida numa leitura (Windows),
+        # entregue no próximo flush
+        self._pendentes = {}
+
+    @contextlib.contextmanager
+    def _travar(self):
+        if not self.concorrente or self._nivel_trava:
+            self._nivel_trava += 1
+            try:
+                yield
+            finally:
+                self._nivel_trava -= 1
+            return
+        with open(self.arquivo_trava, "a+b") as f:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            else:
+                # LK_LOCK desiste depois de ~10 s: tenta sem bloquear até conseguir
+                f.seek(0)
+                while True:
+                    try:
+                        msvcrt.locking(f.fileno(), msvcrt.LK_NBLCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(_ESPERA_TRAVA)
+            self._nivel_trava += 1
+            try:
+                yield
+            finally:
+                self._nivel_trava -= 1
+                if fcntl:
+                    fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+                else:
+                    f.seek(0)
+                    msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+    def carregar(self):
+        with self._travar():
+            posicao, assinatura = self._posicao_journal, self._assinatura_snapshot
+            linhas = {}
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", newline='', encoding='utf-8') as f:
+                    reader = csv.DictReader(f)
+                    for row in reader:
+                        linhas[row["ra"]] = [row[c] for c in CABECALHO[:_VERSAO]] + [row.get("versao") or "0"]
+            self._removidos = self._aplicar_journal(linhas)
+            if self.concorrente and self._carregado:
+                # Carga completa depois da abertura preguiçosa: mantém o ponto de sincronização,
+                # para que perfis já materializados recebam as gravações externas no próximo flush
+                self._posicao_journal, self._assinatura_snapshot = posicao, assinatura
+            else:
+                self._assinatura_snapshot = self._assinatura()
+            self._carregado = True
+        if self.concorrente:
+            for ra, linha in linhas.items():
+                self._bases.setdefault(ra, linha)
+        return list(linhas.values())
+
+    def abrir(self):
+        with self._travar():
+            self._linhas_journal = {}
+            self._removidos = self._aplicar_journal(self._linhas_journal)
+            self._abrir_snapshot()
+            self._carregado = True
+
+    def ler(self, ra):
+        linha = self._ler_linha(ra)
+        if linha is not None and self.concorrente:
+            self._bases[ra] = linha
+        return linha
+
+    def _ler_linha(self, ra):
+        if ra in self._removidos:
+            return None
+        linha = self._linhas_journal.get(ra)
+        if linha is not None:
+            return linha
+        if not _MANTER_SNAPSHOT_ABERTO:
+            return self._ler_do_snapshot(ra)
+        offset = self._offsets.buscar(ra) if self._offsets else None
+        if offset is None:
+            return None
+        # Lê pelo descritor aberto junto com o índice: se outro processo trocar o
+        # snapshot, os offsets continuam válidos e a versão antiga é detectada no flush
+        self._snapshot.seek(offset)
+        return _normalizar(next(csv.reader([self._snapshot.readline().decode('utf-8')])))
+
+    def _ler_do_snapshot(self, ra):
+        # Windows: índice e snapshot abertos só durante a leitura. Sem o descritor antigo,
+        # uma troca de snapshot é sincronizada aqui e o resultado fica para o próximo flush
+        with self._travar():
+            if self.concorrente and self._assinatura() != self._assinatura_snapshot:
+                self._pendentes.update(self._ressincronizar())
+                return self._ler_linha(ra)
+            indice = self._carregar_indice()
+            if indice is None:
+                return None
+            try:
+                offset = indice.buscar(ra)
+            finally:
+                indice.fechar()
+            if offset is None:
+                return None
+            with open(self.arquivo, "rb") as f:
+                f.seek(offset)
+                return _normalizar(next(csv.reader([f.readline().decode('utf-8')])))
+
+    @contextlib.contextmanager
+    def _snapshot_para_varredura(self):
+        # Snapshot coerente com as linhas do journal em memória, posicionado no início
+        if _MANTER_SNAPSHOT_ABERTO:
+            if self._snapshot:
+                self._snapshot.seek(0)
+            yield self._snapshot
+            return
+        with self._travar():
+            if self.concorrente and self._assinatura() != self._assinatura_snapshot:
+                self._pendentes.update(self._ressincronizar())
+            if not os.path.exists(self.arquivo):
+                yield None
+                return
+            with open(self.arquivo, "rb") as f:
+                yield f
+
+    def contar_materias(self, materias):
+        # Sem índice invertido em disco: varre o snapshot (O(n), mas só separa as colunas,
+        # sem montar perfis) e aplica por cima as linhas do journal
+        procuradas = set(materias)
+        pontos = {}
+
+        def contar(ra, campo):
+            comuns = len(procuradas.intersection(campo.split(";"))) if campo else 0
+            if comuns:
+                pontos[ra] = comuns
+
+        with self._snapshot_para_varredura() as f:
+            if f:
+                reader = csv.reader(linha.decode('utf-8') for linha in f)
+                next(reader, None)
+                for row in reader:
+                    if row[0] not in self._linhas_journal and row[0] not in self._removidos:
+                        contar(row[0], row[3])
+        for ra, linha in self._linhas_journal.items():
+            contar(ra, linha[3])
+        return pontos
+
+    def amigos_de(self, ras):
+        # Uma busca no .idx por RA
+        resultado = {}
+        for ra in ras:
+            linha = self._ler_linha(ra)
+            if linha is not None:
+                resultado[ra] = linha[4].split(";") if linha[4] else []
+        return resultado
+
+    def _abrir_snapshot(self):
+        self._fechar_snapshot()
+        if _MANTER_SNAPSHOT_ABERTO:
+            self._offsets = self._carregar_indice()
+            if self._offsets:
+                self._snapshot = open(self.arquivo, "rb")
+        else:
+            # Só valida (ou reconstrói) o .idx agora, para as leituras não pagarem por isso
+            indice = self._carregar_indice()
+            if indice:
+                indice.fechar()
+        self._assinatura_snapshot = self._assinatura()
+
+    def _fechar_snapshot(self):
+        if self._offsets:
+            self._offsets.fechar()
+            self._offsets = None
+        if self._snapshot:
+            self._snapshot.close()
+            self._snapshot = None
+
+    def _assinatura(self):
+        if not os.path.exists(self.arquivo):
+            return None
+        estado = os.stat(self.arquivo)
+        return (estado.st_ino, estado.st_mtime_ns, estado.st_size)
+
+    def _ler_journal(self, inicio=0):
+        # Devolve [(ra, linha)] a partir do byte `inicio`; linha None indica remoção
+        if not self.journal or not os.path.exists(self.arquivo_journal):
+            self._posicao_journal = 0
+            return []
+        with open(self.arquivo_journal, "rb") as f:
+            f.seek(inicio)
+            dados = f.read()
+        fim = dados.rfind(b"\n") + 1
+        if fim < len(dados):
+            # Registro incompleto no fim (queda no meio de um append): é cortado do arquivo,
+            # senão o próximo append continuaria a mesma linha e também se perderia.
+            # Appends e leituras acontecem com a trava, então não é um append em andamento
+            os.truncate(self.arquivo_journal, inicio + fim)
+            dados = dados[:fim]
+        self._posicao_journal = inicio + fim
+        registros = []
+        for row in csv.reader(io.StringIO(dados.decode('utf-8', errors='replace'), newline='')):
+            # Registros malformados são ignorados
+            if (row and row[0] == OP_SALVAR and len(CABECALHO) <= len(row) <= len(CABECALHO) + 1
+                    and linha_valida(_normalizar(row[1:]))):
+                registros.append((row[1], _normalizar(row[1:])))
+            elif row and row[0] == OP_REMOVER and len(row) == 2:
+                registros.append((row[1], None))
+        return registros
+
+    def _aplicar_journal(self, linhas):
+        removidos = set()
+        registros = self._ler_journal()
+        for ra, linha in registros:
+            if linha is None:
+                linhas.pop(ra, None)
+                removidos.add(ra)
+            else:
+                linhas[ra] = linha
+                removidos.discard(ra)
+        self.registros_journal = len(registros)
+        return removidos
+
+    def _sincronizar(self):
+        # Chamado com a trava: devolve {ra: linha ou None} do que outros processos gravaram
+        externos, self._pendentes = self._pendentes, {}
+        if self._assinatura() != self._assinatura_snapshot:
+            externos.update(self._ressincronizar())
+            return externos
+        registros = self._ler_journal(self._posicao_journal)
+        for ra, linha in registros:
+            externos[ra] = linha
+            if linha is None:
+                self._linhas_journal.pop(ra, None)
+                self._removidos.add(ra)
+            else:
+                if self.preguicoso:
+                    self._linhas_journal[ra] = linha
+                self._removidos.discard(ra)
+        self.registros_journal += len(registros)
+        return externos
+
+    def _ressincronizar(self):
+        # Outro processo compactou: relê o estado e compara versões com o que conhecemos
+        externos = {}
+        if self.preguicoso:
+            self._linhas_journal = {}
+            self._removidos = self._aplicar_journal(self._linhas_journal)
+            self._abrir_snapshot()
+            for ra, base in self._bases.items():
+                linha = self._ler_linha(ra)
+                if linha is None or linha[_VERSAO] != base[_VERSAO]:
+                    externos[ra] = linha
+        else:
+            linhas = {}
+            if os.path.exists(self.arquivo):
+                with open(self.arquivo, "r", newline='', encoding='utf-8') as f:
+                    reader = csv.reader(f)
+                    next(reader, None)
+                    for row in reader:
+                        linhas[row[0]] = _normalizar(row)
+            self._removidos = self._aplicar_journal(linhas)
+            for ra, linha in linhas.items():
+                base = self._bases.get(ra)
+                if base is None or linha[_VERSAO] != base[_VERSAO]:
+                    externos[ra] = linha
+            for ra in self._bases:
+                if ra not in linhas:
+                    externos[ra] = None
+        self._assinatura_snapshot = self._assinatura()
+        return externos
+
+    def _carregar_indice(self):
+        if not os.path.exists(self.arquivo):
+            return None
+        estado = os.stat(self.arquivo)
+        assinatura = f"{estado.st_mtime_ns} {estado.st_size}"
+        indice = IndiceOffsets.abrir(self.arquivo_indice, assinatura)
+        if indice is None:
+            # Índice ausente ou desatualizado (mtime/tamanho mudaram): varre só a primeira coluna
+            IndiceOffsets.construir(self.arquivo, self.arquivo_indice, assinatura)
+            indice = IndiceOffsets.abrir(self.arquivo_indice, assinatura)
+        return indice
+
+    def gravar(self, alterados, removidos, todos, aplicar=None):
+        with self._travar():
+            if not self.journal:
+                self.escrever_snapshot(todos)
+                return
+            if self.concorrente:
+                self._resolver_conflitos(alterados, removidos, aplicar)
+            linhas = []
+            for u in alterados:
+                if self.concorrente:
+                    u.versao += 1
+                linha = perfil_para_linha(u)
+                linhas.append([OP_SALVAR] + linha)
+                if self.concorrente:
+                    self._bases[u.ra] = [str(c) for c in linha]
+            linhas.extend([OP_REMOVER, ra] for ra in removidos)
+            if linhas:
+                self._anexar(linhas)
+            for u in alterados:
+                self._removidos.discard(u.ra)
+            self._removidos.update(removidos)
+            for ra in removidos:
+                self._bases.pop(ra, None)
+            if self.registros_journal >= self.limite_journal:
+                self.compactar(todos)
+
+    def compactar(self, todos):
+        # Se cair entre o replace e o truncate, o replay do journal é idempotente
+        with self._travar():
+            self.escrever_snapshot(todos)
+            if os.path.exists(self.arquivo_journal):
+                os.remove(self.arquivo_journal)
+            self.registros_journal = 0
+            self._posicao_journal = 0
+
+    def escrever_snapshot(self, todos):
+        temporario = self.arquivo + ".tmp"
+        with open(temporario, "w", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerow(CABECALHO)
+            if self.preguicoso:
+                self._mesclar_snapshot(writer, todos)
+            else:
+                for u in todos:
+                    writer.writerow(perfil_para_linha(u))
+            f.flush()
+            os.fsync(f.fileno())
+        self._fechar_snapshot()
+        os.replace(temporario, self.arquivo)
+        self._assinatura_snapshot = self._assinatura()
+        if self.preguicoso:
+            self._linhas_journal = {}
+            self._removidos = set()
+            self._abrir_snapshot()
+
+    def _mesclar_snapshot(self, writer, todos):
+        # Em modo preguiçoso `todos` só tem os perfis materializados; o resto vem do arquivo antigo
+        atuais = {u.ra: u for u in todos}
+        escritos = set()
+        if os.path.exists(self.arquivo):
+            with open(self.arquivo, "r", newline='', encoding='utf-8') as antigo:
+                reader = csv.reader(antigo)
+                next(reader, None)
+                for row in reader:
+                    escritos.add(row[0])
+                    if row[0] in atuais:
+                        writer.writerow(perfil_para_linha(atuais[row[0]]))
+                    elif row[0] not in self._removidos:
+                        writer.writerow(self._linhas_journal.get(row[0]) or _normalizar(row))
+        for ra, linha in self._linhas_journal.items():
+            if ra not in escritos and ra not in atuais and ra not in self._removidos:
+                writer.writerow(linha)
+        for ra, u in atuais.items():
+            if ra not in escritos:
+                writer.writerow(perfil_para_linha(u))
+
+    def _anexar(self, linhas):
+        with open(self.arquivo_journal, "a", newline='', encoding='utf-8') as f:
+            writer = csv.writer(f)
+            writer.writerows(linhas)
+            f.flush()
+            os.fsync(f.fileno())
+            self._posicao_journal = os.fstat(f.fileno()).st_size
+        self.registros_journal += len(linhas)
+
+
+class IndiceOffsets:
+    # Arquivo auxiliar com registros de largura fixa (RA, offset) ordenados por RA:
+    # a busca binária é feita direto no mmap, sem carregar o índice para a memória
+    def __init__(self, arquivo, mapa, inicio, largura, total):
+        self.arquivo = arquivo
+        self.mapa = mapa
+        self.inicio = inicio
+        self.largura = largura
+        self.total = total
+
+    @staticmethod
+    def construir(arquivo_csv, arquivo_indice, assinatura):
+        entradas = []
+        with open(arquivo_csv, "rb") as f:
+            offset = len(f.readline())
+            for linha in f:
+                entradas.append((linha.split(b",", 1)[0].strip(b'"'), offset))
+                offset += len(linha)
+        entradas.sort()
+        largura = max((len(ra) for ra, _ in entradas), default=1)
+
+        temporario = arquivo_indice + ".tmp"
+        with open(temporario, "wb") as f:
+            f.write(f"{assinatura} {largura}\n".encode('ascii'))
+            for ra, offset in entradas:
+                f.write(ra.ljust(largura, b"\0"))
+                f.write(_OFFSET.pack(offset))
+        os.replace(temporario, arquivo_indice)
+
+    @classmethod
+    def abrir(cls, arquivo_indice, assinatura):
+        if not os.path.exists(arquivo_indice):
+            return None
+        f = open(arquivo_indice, "rb")
+        cabecalho = f.readline().decode('ascii').rsplit(" ", 1)
+        if len(cabecalho) != 2 or cabecalho[0] != assinatura:
+            f.close()
+            return None
+        largura = int(cabecalho[1])
+        inicio = f.tell()
+        tamanho = os.fstat(f.fileno()).st_size
+        mapa = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        total = (tamanho - inicio) // (largura + _OFFSET.size)
+        return cls(f, mapa, inicio, largura, total)
+
+    def buscar(self, ra):
+        chave = ra.encode('utf-8').ljust(self.largura, b"\0")
+        if len(chave) > self.largura:
+            return None
+        passo = self.largura + _OFFSET.size
+        baixo, alto = 0, self.total
+        while baixo < alto:
+            meio = (baixo + alto) // 2
+            posicao = self.inicio + meio * passo
+            atual = self.mapa[posicao:posicao + self.largura]
+            if atual < chave:
+                baixo = meio + 1
+            elif atual > chave:
+                alto = meio
+            else:
+                return _OFFSET.unpack_from(self.mapa, posicao + self.largura)[0]
+        return None
+
+    def fechar(self):
+        self.mapa.close()
+        self.arquivo.close()
+
+
+_ESQUEMA_USUARIOS = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    ra TEXT PRIMARY KEY,
+    nome TEXT NOT NULL,
+    email TEXT NOT NULL,
+    grupos INTEGER NOT NULL,
+    versao INTEGER NOT NULL,
+    geracao INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS usuarios_por_geracao ON usuarios (geracao);
+CREATE TABLE IF NOT EXISTS materias (
+    ra TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    materia TEXT NOT NULL,
+    PRIMARY KEY (ra, posicao)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS materias_por_nome ON materias (materia);
+CREATE TABLE IF NOT EXISTS amizades (
+    ra TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    amigo TEXT NOT NULL,
+    PRIMARY KEY (ra, posicao)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS amizades_por_amigo ON amizades (amigo);
+CREATE TABLE IF NOT EXISTS remocoes (
+    ra TEXT PRIMARY KEY,
+    geracao INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS remocoes_por_geracao ON remocoes (geracao);
+CREATE TABLE IF NOT EXISTS geracao (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    valor INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO geracao (id, valor) VALUES (0, 0);
+"""
+
+# SQL fixo: o sqlite3 guarda os statements preparados em cache e os reaproveita
+# Um único SELECT por perfil: leitura consistente sem abrir transação
+_SQL_LER = (
+    "SELECT nome, email, "
+    "(SELECT group_concat(materia, ';') FROM "
+    "(SELECT materia FROM materias WHERE ra = ?1 ORDER BY posicao)), "
+    "(SELECT group_concat(amigo, ';') FROM "
+    "(SELECT amigo FROM amizades WHERE ra = ?1 ORDER BY posicao)), "
+    "grupos, versao FROM usuarios WHERE ra = ?1")
+_SQL_SALVAR = ("INSERT OR REPLACE INTO usuarios (ra, nome, email, grupos, versao, geracao) "
+               "VALUES (?, ?, ?, ?, ?, ?)")
+_SQL_SALVAR_MATERIA = "INSERT INTO materias (ra, posicao, materia) VALUES (?, ?, ?)"
+_SQL_SALVAR_AMIGO = "INSERT INTO amizades (ra, posicao, amigo) VALUES (?, ?, ?)"
+# RAs por consulta com IN (...)
+_LOTE_PARAMETROS = 500
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    # Perfis normalizados: matérias e amizades em tabelas próprias, indexadas pelos dois lados.
+    # Cada lote gravado recebe uma geração; outros processos sincronizam pelo que mudou
+    # desde a última geração que viram (sem varrer o banco)
+    def __init__(self, arquivo, concorrente=False, **_):
+        self.arquivo = arquivo
+        self.conexao = sqlite3.connect(arquivo, timeout=30, isolation_level=None,
+                                       cached_statements=64)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(_ESQUEMA_USUARIOS)
+        self.concorrente = concorrente
+        self._bases = {}
+        self._geracao = 0
+        self._carregado = False
+
+    @contextlib.contextmanager
+    def _transacao(self, modo="IMMEDIATE"):
+        self.conexao.execute(f"BEGIN {modo}")
+        try:
+            yield
+        except BaseException:
+            self.conexao.execute("ROLLBACK")
+            raise
+        self.conexao.execute("COMMIT")
+
+    def _geracao_atual(self):
+        return self.conexao.execute("SELECT valor FROM geracao").fetchone()[0]
+
+    def carregar(self):
+        with self._transacao("DEFERRED"):
+            if not (self.concorrente and self._carregado):
+                self._geracao = self._geracao_atual()
+            # Senão é a carga completa depois da abertura preguiçosa: mantém a geração vista
+            # no abrir(), para que perfis já materializados recebam as gravações externas
+            # no próximo flush
+            self._carregado = True
+            linhas = {ra: [ra, nome, email, [], [], str(grupos), str(versao)]
+                      for ra, nome, email, grupos, versao in self.conexao.execute(
+                          "SELECT ra, nome, email, grupos, versao FROM usuarios")}
+            for coluna, sql in ((3, "SELECT ra, materia FROM materias ORDER BY ra, posicao"),
+                                (4, "SELECT ra, amigo FROM amizades ORDER BY ra, posicao")):
+                for ra, valor in self.conexao.execute(sql):
+                    linha = linhas.get(ra)
+                    if linha is not None:
+                        linha[coluna].append(valor)
+        for linha in linhas.values():
+            linha[3] = ";".join(linha[3])
+            linha[4] = ";".join(linha[4])
+        if self.concorrente:
+            for ra, linha in linhas.items():
+                self._bases.setdefault(ra, linha)
+        return list(linhas.values())
+
+    def abrir(self):
+        self._geracao = self._geracao_atual()
+        self._carregado = True
+
+    def ler(self, ra):
+        linha = self._ler_linha(ra)
+        if linha is not None and self.concorrente:
+            self._bases[ra] = linha
+        return linha
+
+    def contar_materias(self, materias):
+        # Pelo índice materias_por_nome: só as linhas das matérias pedidas
+        materias = list(set(materias))
+        if not materias:
+            return {}
+        return dict(self.conexao.execute(
+            f"SELECT ra, COUNT(*) FROM materias WHERE materia IN ({','.join('?' * len(materias))}) "
+            "GROUP BY ra", materias))
+
+    def amigos_de(self, ras):
+        # Pela chave primária (ra, posicao), em lotes abaixo do limite de parâmetros do SQLite
+        ras = list(ras)
+        resultado = {}
+        for i in range(0, len(ras), _LOTE_PARAMETROS):
+            lote = ras[i:i + _LOTE_PARAMETROS]
+            for ra, amigo in self.conexao.execute(
+                    f"SELECT ra, amigo FROM amizades WHERE ra IN ({','.join('?' * len(lote))}) "
+                    "ORDER BY ra, posicao", lote):
+                resultado.setdefault(ra, []).append(amigo)
+        return resultado
+
+    def _ler_linha(self, ra):
+        linha = self.conexao.execute(_SQL_LER, (ra,)).fetchone()
+        if linha is None:
+            return None
+        nome, email, materias, amigos, grupos, versao = linha
+        return [ra, nome, email, materias or "", amigos or "", str(grupos), str(versao)]
+
+    def _sincronizar(self):
+        # Chamado dentro da transação de escrita: {ra: linha ou None} gravado por outros
+        externos = {}
+        for ra, in self.conexao.execute(
+                "SELECT ra FROM usuarios WHERE geracao > ?", (self._geracao,)).fetchall():
+            externos[ra] = self._ler_linha(ra)
+        for ra, in self.conexao.execute(
+                "SELECT ra FROM remocoes WHERE geracao > ?", (self._geracao,)):
+            externos[ra] = None
+        return externos
+
+    def gravar(self, alterados, removidos, todos, aplicar=None):
+        with self._transacao():
+            if self.concorrente:
+                self._resolver_conflitos(alterados, removidos, aplicar)
+            geracao = self._geracao_atual() + 1
+            usuarios, materias, amigos = [], [], []
+            for u in alterados:
+                if self.concorrente:
+                    u.versao += 1
+                    self._bases[u.ra] = [str(c) for c in perfil_para_linha(u)]
+                usuarios.append((u.ra, u.nome, u.email, u.grupos_participados, u.versao, geracao))
+                materias.extend((u.ra, i, m) for i, m in enumerate(u.materias_interesse))
+                amigos.extend((u.ra, i, a) for i, a in enumerate(u.amigos))
+            ras = [(u.ra,) for u in alterados] + [(ra,) for ra in removidos]
+            self.conexao.executemany("DELETE FROM materias WHERE ra = ?", ras)
+            self.conexao.executemany("DELETE FROM amizades WHERE ra = ?", ras)
+            self.conexao.executemany("DELETE FROM remocoes WHERE ra = ?", ras[:len(alterados)])
+            self.conexao.executemany("DELETE FROM usuarios WHERE ra = ?", ras[len(alterados):])
+            self.conexao.executemany(
+                "INSERT OR REPLACE INTO remocoes (ra, geracao) VALUES (?, ?)",
+                [(ra, geracao) for ra in removidos])
+            self.conexao.executemany(_SQL_SALVAR, usuarios)
+            self.conexao.executemany(_SQL_SALVAR_MATERIA, materias)
+            self.conexao.executemany(_SQL_SALVAR_AMIGO, amigos)
+            self.conexao.execute("UPDATE geracao SET valor = ?", (geracao,))
+        self._geracao = geracao
+        for ra in removidos:
+            self._bases.pop(ra, None)
+
+    def importar(self, linhas, lote=10_000):
+        # Carga inicial em massa (migração): uma transação só, inserções em lotes
+        with self._transacao():
+            geracao = self._geracao_atual() + 1
+            usuarios, materias, amigos = [], [], []
+            for ra, nome, email, lista_materias, lista_amigos, grupos, versao in linhas:
+                usuarios.append((ra, nome, email, int(grupos), int(versao), geracao))
+                if lista_materias:
+                    materias.extend((ra, i, m) for i, m in enumerate(lista_materias.split(";")))
+                if lista_amigos:
+                    amigos.extend((ra, i, a) for i, a in enumerate(lista_amigos.split(";")))
+                if len(usuarios) >= lote:
+                    self._inserir_lote(usuarios, materias, amigos)
+            self._inserir_lote(usuarios, materias, amigos)
+            self.conexao.execute("UPDATE geracao SET valor = ?", (geracao,))
+        self._geracao = geracao
+
+    def _inserir_lote(self, usuarios, materias, amigos):
+        self.conexao.executemany(_SQL_SALVAR, usuarios)
+        self.conexao.executemany(_SQL_SALVAR_MATERIA, materias)
+        self.conexao.executemany(_SQL_SALVAR_AMIGO, amigos)
+        usuarios.clear()
+        materias.clear()
+        amigos.clear()
+
+    def total_usuarios(self):
+        return self.conexao.execute("SELECT COUNT(*) FROM usuarios").fetchone()[0]
+
+    def fechar(self):
+        self.conexao.close()
+
+
+FORMATOS = {"csv": ArmazenamentoCSV, "sqlite": ArmazenamentoSQLite}
+
+
+_ESQUEMA_GRUPOS = """
+CREATE TABLE IF NOT EXISTS membros (
+    materia TEXT NOT NULL,
+    ra TEXT NOT NULL,
+    entrada INTEGER NOT NULL,
+    lido INTEGER NOT NULL,
+    PRIMARY KEY (materia, ra)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS membros_por_ra ON membros (ra);
+CREATE TABLE IF NOT EXISTS eventos (
+    materia TEXT NOT NULL,
+    posicao INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    modelo INTEGER NOT NULL,
+    args TEXT NOT NULL,
+    PRIMARY KEY (materia, posicao)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS notificacoes (
+    ra TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    modelo INTEGER NOT NULL,
+    args TEXT NOT NULL,
+    lida INTEGER NOT NULL,
+    PRIMARY KEY (ra, seq)
+) WITHOUT ROWID;
+"""
+
+
+class ArmazenamentoGrupos:
+    # Grupos, membros, log de eventos de cada grupo e notificações pessoais.
+    # Tudo indexado por matéria ou RA, para carregar só o que o usuário logado precisa
+    def __init__(self, arquivo):
+        self.conexao = sqlite3.connect(arquivo, timeout=30)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(_ESQUEMA_GRUPOS)
+
+    def total_eventos(self, materia):
+        return self.conexao.execute(
+            "SELECT COALESCE(MAX(posicao) + 1, 0) FROM eventos WHERE materia = ?", (materia,)
+        ).fetchone()[0]
+
+    def adicionar_membro(self, materia, ra, evento, notificacao):
+        # Entrada no grupo: 1 membro + 1 evento compartilhado + 1 notificação pessoal
+        with self.conexao:
+            cursor = self.conexao.execute(
+                "INSERT OR IGNORE INTO membros (materia, ra, entrada, lido) VALUES (?, ?, 0, 0)",
+                (materia, ra))
+            if cursor.rowcount == 0:
+                return None
+            seq = time.time_ns()
+            modelo, args = evento
+            self.conexao.execute(
+                "INSERT INTO eventos (materia, posicao, seq, modelo, args) "
+                "SELECT ?, COALESCE(MAX(posicao) + 1, 0), ?, ?, ? FROM eventos WHERE materia = ?",
+                (materia, seq, modelo, json.dumps(args), materia))
+            total = self.total_eventos(materia)
+            self.conexao.execute(
+                "UPDATE membros SET entrada = ?, lido = ? WHERE materia = ? AND ra = ?",
+                (total, total, materia, ra))
+            modelo, args = notificacao
+            self.conexao.execute(
+                "INSERT INTO notificacoes (ra, seq, modelo, args, lida) VALUES (?, ?, ?, ?, 0)",
+                (ra, seq - 1, modelo, json.dumps(args)))
+        return total, seq - 1
+
+    def registrar_membro(self, materia, ra):
+        # Membro sem evento nem notificação (reconciliação de dados antigos)
+        with self.conexao:
+            total = self.total_eventos(materia)
+            self.conexao.execute(
+                "INSERT OR IGNORE INTO membros (materia, ra, entrada, lido) VALUES (?, ?, ?, ?)",
+                (materia, ra, total, total))
+        return total
+
+    def grupos_do_usuario(self, ra):
+        return self.conexao.execute(
+            "SELECT materia, entrada, lido FROM membros WHERE ra = ?", (ra,)).fetchall()
+
+    def notificacoes_do_usuario(self, ra):
+        return [(seq, modelo, tuple(json.loads(args)), bool(lida)) for seq, modelo, args, lida in
+                self.conexao.execute(
+                    "SELECT seq, modelo, args, lida FROM notificacoes WHERE ra = ? ORDER BY seq", (ra,))]
+
+    def podar_notificacoes(self, ra, capacidade):
+        with self.conexao:
+            self.conexao.execute(
+                "DELETE FROM notificacoes WHERE ra = ? AND seq < ("
+                "SELECT seq FROM notificacoes WHERE ra = ? ORDER BY seq DESC LIMIT 1 OFFSET ?)",
+                (ra, ra, capacidade - 1))
+
+    def eventos(self, materia, desde):
+        return [(posicao, seq, modelo, tuple(json.loads(args))) for posicao, seq, modelo, args in
+                self.conexao.execute(
+                    "SELECT posicao, seq, modelo, args FROM eventos "
+                    "WHERE materia = ? AND posicao >= ? ORDER BY posicao", (materia, desde))]
+
+    def marcar_lidas(self, ra, cursores):
+        with self.conexao:
+            self.conexao.execute("UPDATE notificacoes SET lida = 1 WHERE ra = ? AND lida = 0", (ra,))
+            self.conexao.executemany(
+                "UPDATE membros SET lido = ? WHERE materia = ? AND ra = ?",
+                [(lido, materia, ra) for materia, lido in cursores.items()])
@@ -0,0 +1,314 @@
+# benchmark.py
+# Micro-benchmarks do sistema de perfis (rodar com: python benchmark.py)
+
+import contextlib
+import csv
+import functools
+import io
+import itertools
+import multiprocessing
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from armazenamento import CABECALHO
+from main import ARQUIVO_CSV, Perfil, Sistema
+from migrar import migrar
+
+
+def isolado(bench):
+    # Sistema() lê e grava usuarios.* no diretório atual: cada benchmark roda num
+    # diretório temporário próprio, apagado no fim, e nunca toca nos arquivos do projeto
+    @functools.wraps(bench)
+    def executar(*args, **kwargs):
+        anterior = os.getcwd()
+        with tempfile.TemporaryDirectory() as diretorio:
+            os.chdir(diretorio)
+            try:
+                return bench(*args, **kwargs)
+            finally:
+                os.chdir(anterior)
+    return executar
+
+
+def criar_sistema(n_usuarios, n_amigos=50, n_materias=5, seed=42):
+    rng = random.Random(seed)
+    materias = [f"Materia {i}" for i in range(200)]
+    sistema = Sistema()
+    for i in range(n_usuarios):
+        sistema.adicionar_usuario(Perfil(
+            f"Aluno {i}", str(i), f"aluno{i}@exemplo.com",
+            rng.sample(materias, n_materias)
+        ))
+    for u in sistema.usuarios[:1000]:
+        for ra in rng.sample(range(n_usuarios), min(n_amigos, n_usuarios)):
+            if str(ra) != u.ra and not sistema.sao_amigos(u.ra, str(ra)):
+                u.amigos.append(str(ra))
+                sistema.ligar_amigos(u.ra, str(ra))
+    return sistema
+
+
+def cronometrar(funcao, repeticoes):
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(repeticoes):
+            funcao()
+    return (time.perf_counter() - inicio) / repeticoes
+
+
+@isolado
+def bench_dashboard(tamanhos=(1_000, 10_000, 100_000), repeticoes=200):
+    print("Dashboard (50 amigos):")
+    for n in tamanhos:
+        sistema = criar_sistema(n)
+        usuario = sistema.usuarios[0]
+        t = cronometrar(lambda: usuario.mostrar_dashboard(sistema), repeticoes)
+        print(f"  {n:>9} usuários: {t * 1e6:8.1f} µs/render")
+
+
+@isolado
+def bench_sugestoes(tamanhos=(10_000, 100_000), repeticoes=50, consultas=20, seed=9):
+    print("Sugestão de parceiros (top 5):")
+    for n in tamanhos:
+        sistema = criar_sistema(n)
+        usuario = sistema.usuarios[0]
+        t = cronometrar(lambda: sistema.sugerir_parceiros(usuario), repeticoes)
+        print(f"  {n:>9} usuários: {t * 1e3:8.2f} ms/consulta")
+
+    # Modo do menu: cada consulta numa sessão nova, sem os perfis em memória. No SQLite as
+    # listas invertidas vêm do índice; no CSV a sugestão varre o snapshot (O(n))
+    print("Sugestões e grau de separação no modo preguiçoso (sessão nova por consulta):")
+    for n in tamanhos:
+        escrever_csv(n)
+        migrar()
+        rng = random.Random(seed)
+        pares = [(str(rng.randrange(n)), str(rng.randrange(n))) for _ in range(consultas)]
+        for formato in ("csv", "sqlite"):
+            Sistema(preguicoso=True, formato=formato)  # constrói o .idx do CSV fora da medição
+            tempos = {"sugestões": 0.0, "grau de separação": 0.0}
+            for ra, outro in pares:
+                sistema = Sistema(preguicoso=True, formato=formato)
+                usuario = sistema.buscar_usuario(ra)
+                inicio = time.perf_counter()
+                sistema.sugerir_parceiros(usuario)
+                tempos["sugestões"] += time.perf_counter() - inicio
+
+                inicio = time.perf_counter()
+                sistema.caminho_entre(ra, outro)
+                tempos["grau de separação"] += time.perf_counter() - inicio
+            medidas = ", ".join(f"{nome} {t / consultas * 1e3:7.2f} ms" for nome, t in tempos.items())
+            print(f"  {n:>9} usuários, {formato:<6}: {medidas}")
+        for nome in os.listdir("."):
+            os.remove(nome)  # só o diretório temporário do @isolado
+
+
+@isolado
+def bench_grafo(n_usuarios=100_000, n_arestas=500_000, consultas=200, seed=7):
+    rng = random.Random(seed)
+    sistema = Sistema()
+    for i in range(n_usuarios):
+        sistema.adicionar_usuario(Perfil(f"Aluno {i}", str(i), f"aluno{i}@exemplo.com"))
+    for _ in range(n_arestas):
+        sistema.ligar_amigos(str(rng.randrange(n_usuarios)), str(rng.randrange(n_usuarios)))
+    pares = [(str(rng.randrange(n_usuarios)), str(rng.randrange(n_usuarios))) for _ in range(consultas)]
+
+    print(f"Grafo de amizades ({n_usuarios} usuários, {n_arestas} arestas):")
+    for nome, funcao in (
+        ("amigos em comum", lambda a, b: sistema.amigos_em_comum(a, b)),
+        ("amigos de amigos", lambda a, b: sistema.amigos_de_amigos(a)),
+        ("grau de separação", lambda a, b: sistema.caminho_entre(a, b)),
+    ):
+        inicio = time.perf_counter()
+        for a, b in pares:
+            funcao(a, b)
+        t = (time.perf_counter() - inicio) / consultas
+        print(f"  {nome:<18}: {t * 1e3:8.3f} ms/consulta")
+
+
+class _PerfilSemSlots:
+    # Representação anterior: __dict__ por instância e strings sem internar
+    def __init__(self, nome, ra, email, materias, amigos, grupos):
+        self.nome = nome
+        self.ra = ra
+        self.email = email
+        self.materias_interesse = materias
+        self.amigos = amigos
+        self.grupos_participados = grupos
+        self.notificacoes = []
+
+
+def _carregar_sem_slots():
+    with open(ARQUIVO_CSV, "r", newline='', encoding='utf-8') as f:
+        return [_PerfilSemSlots(
+            row["nome"], row["ra"], row["email"],
+            row["materias"].split(";") if row["materias"] else [],
+            row["amigos"].split(";") if row["amigos"] else [],
+            int(row["grupos"])
+        ) for row in csv.DictReader(f)]
+
+
+def _bytes_alocados(funcao):
+    tracemalloc.start()
+    resultado = funcao()
+    atual, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return atual, resultado
+
+
+def escrever_csv(n_usuarios, seed=3):
+    rng = random.Random(seed)
+    materias = [f"Materia {i}" for i in range(200)]
+    with open(ARQUIVO_CSV, "w", newline='', encoding='utf-8') as f:
+        writer = csv.writer(f)
+        writer.writerow(CABECALHO)
+        for i in range(n_usuarios):
+            amigos = rng.sample(range(n_usuarios), 20)
+            writer.writerow([i, f"Aluno {i}", f"aluno{i}@exemplo.com",
+                             ";".join(rng.sample(materias, 5)),
+                             ";".join(map(str, amigos)), 0])
+
+
+@isolado
+def bench_memoria(n_usuarios=50_000):
+    # Comparação justa: o Sistema antigo era só a lista de perfis (dicts, sem índices);
+    # o atual tem perfis menores, mas também os índices por RA, matérias e o grafo.
+    # A meta de reduzir a memória total NÃO foi atingida: os perfis ficaram ~3x menores,
+    # mas o grafo (segunda cópia, em sets, de cada lista de amigos) deixa o Sistema
+    # completo acima do antes (+64% com 50 mil perfis)
+    escrever_csv(n_usuarios)
+    print(f"Memória ({n_usuarios} perfis, 5 matérias e 20 amigos cada):")
+    antes, _ = _bytes_alocados(_carregar_sem_slots)
+    print(f"  antes, Sistema sem índices (dict, sem intern): {antes / n_usuarios:8.0f} bytes/perfil")
+    perfis, usuarios = _bytes_alocados(lambda: Sistema(journal=False).usuarios)
+    print(f"  depois, só perfis (slots + intern)           : {perfis / n_usuarios:8.0f} bytes/perfil")
+    total, _ = _bytes_alocados(lambda: Sistema(journal=False))
+    print(f"  depois, Sistema completo (perfis + índices)  : {total / n_usuarios:8.0f} bytes/perfil "
+          f"({(total / antes - 1) * 100:+.0f}% sobre o antes)")
+    # O grafo guarda de novo, como set, cada lista Perfil.amigos
+    grafo, _ = _bytes_alocados(lambda: {u.ra: set(u.amigos) for u in usuarios})
+    print(f"    grafo de amizades                          : {grafo / n_usuarios:8.0f} bytes/perfil")
+    print(f"    demais índices (RA, posições, matérias)    : {(total - perfis - grafo) / n_usuarios:8.0f} bytes/perfil")
+    os.remove(ARQUIVO_CSV)
+
+
+@isolado
+def bench_inicializacao(tamanhos=(10_000, 100_000, 200_000)):
+    print("Inicialização + login (buscar 1 perfil):")
+    for n in tamanhos:
+        escrever_csv(n)
+        for nome, kwargs in (("completo", {}),
+                             ("preguiçoso", {"preguicoso": True}),
+                             ("preguiçoso, .idx em cache", {"preguicoso": True})):
+            inicio = time.perf_counter()
+            Sistema(**kwargs).buscar_usuario(str(n // 2))
+            t = time.perf_counter() - inicio
+            print(f"  {n:>9} usuários, {nome:<26}: {t * 1e3:8.1f} ms")
+        os.remove(ARQUIVO_CSV)
+        os.remove(os.path.splitext(ARQUIVO_CSV)[0] + ".idx")
+
+
+def _trabalhador_concorrente(pares, operacoes, seed, fila, formato):
+    rng = random.Random(seed)
+    sistema = Sistema(preguicoso=True, concorrente=True, max_operacoes=5, formato=formato)
+    esperado = {}
+    inicio = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(operacoes):
+            a, b = rng.choice(pares)
+            perfil = sistema.buscar_usuario(a)
+            if sistema.sao_amigos(a, b):
+                perfil.remover_amigo(b, sistema)
+                esperado[(a, b)] = False
+            else:
+                perfil.adicionar_amigo(b, sistema)
+                esperado[(a, b)] = True
+            sistema.talvez_descarregar()
+        sistema.descarregar()
+    fila.put((esperado, time.perf_counter() - inicio))
+
+
+@isolado
+def bench_concorrencia(n_processos=4, operacoes=300, n_usuarios=30, seed=11, formato="csv"):
+    # Cada par de usuários pertence a um único processo, então o estado final esperado
+    # de cada amizade é conhecido; qualquer divergência é uma atualização perdida
+    sistema = Sistema(journal=False, formato=formato)
+    for i in range(n_usuarios):
+        Perfil(f"Aluno {i}", str(i), f"aluno{i}@exemplo.com").salvar(sistema)
+    sistema.descarregar()
+
+    rng = random.Random(seed)
+    pares = list(itertools.combinations(map(str, range(n_usuarios)), 2))
+    rng.shuffle(pares)
+    fila = multiprocessing.Queue()
+    processos = [
+        multiprocessing.Process(target=_trabalhador_concorrente,
+                                args=(pares[i::n_processos], operacoes, seed + i, fila, formato))
+        for i in range(n_processos)
+    ]
+    inicio = time.perf_counter()
+    for p in processos:
+        p.start()
+    resultados = [fila.get() for _ in processos]
+    for p in processos:
+        p.join()
+    total = time.perf_counter() - inicio
+
+    final = Sistema(formato=formato)
+    perdidas = 0
+    for esperado, _ in resultados:
+        for (a, b), amigos in esperado.items():
+            if final.sao_amigos(a, b) != amigos or final.sao_amigos(b, a) != amigos:
+                perdidas += 1
+    print(f"Concorrência, {formato} ({n_processos} processos x {operacoes} operações de amizade):")
+    print(f"  vazão: {n_processos * operacoes / total:8.0f} operações/s")
+    print(f"  atualizações perdidas: {perdidas}")
+    return perdidas
+
+
+@isolado
+def bench_armazenamentos(tamanhos=(10_000, 100_000, 1_000_000), consultas=50, seed=5):
+    # Mesmos dados nos dois formatos; cada login é um processo "frio" (Sistema novo, modo preguiçoso)
+    print("CSV x SQLite (login, adicionar amigo com flush, dashboard):")
+    for n in tamanhos:
+        escrever_csv(n)
+        migrar()
+        rng = random.Random(seed)
+        ras = [str(rng.randrange(n)) for _ in range(consultas)]
+        for formato in ("csv", "sqlite"):
+            Sistema(preguicoso=True, formato=formato)  # constrói o .idx do CSV fora da medição
+            tempos = {"login": 0.0, "adicionar amigo": 0.0, "dashboard": 0.0}
+            with contextlib.redirect_stdout(io.StringIO()):
+                for ra in ras:
+                    inicio = time.perf_counter()
+                    sistema = Sistema(preguicoso=True, formato=formato)
+                    usuario = sistema.buscar_usuario(ra)
+                    tempos["login"] += time.perf_counter() - inicio
+
+                    inicio = time.perf_counter()
+                    usuario.adicionar_amigo(str(rng.randrange(n)), sistema)
+                    sistema.descarregar()
+                    tempos["adicionar amigo"] += time.perf_counter() - inicio
+
+                    inicio = time.perf_counter()
+                    usuario.mostrar_dashboard(sistema)
+                    tempos["dashboard"] += time.perf_counter() - inicio
+            medidas = ", ".join(f"{nome} {t / consultas * 1e3:7.2f} ms" for nome, t in tempos.items())
+            print(f"  {n:>9} usuários, {formato:<6}: {medidas}")
+        for nome in os.listdir("."):
+            os.remove(nome)  # só o diretório temporário do @isolado
+
+
+if __name__ == "__main__":
+    bench_dashboard()
+    bench_sugestoes()
+    bench_grafo()
+    bench_memoria()
+    bench_inicializacao()
+    perdidas = bench_concorrencia() + bench_concorrencia(formato="sqlite")
+    bench_armazenamentos()
+    # Atualização perdida é erro de correção, não de desempenho: falha a execução
+    if perdidas:
+        sys.exit(f"❌ {perdidas} atualizações perdidas nos testes de concorrência")
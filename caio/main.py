@@ -1,35 +1,170 @@
-import csv
+import heapq
 import os
+import sys
+import time
+from collections import Counter, defaultdict, deque
+from itertools import islice
+
+from armazenamento import FORMATOS, ArmazenamentoGrupos
 
 ARQUIVO_CSV = "usuarios.csv"
+ARQUIVO_SQLITE = "usuarios.db"
+
+CAPACIDADE_CAIXA = 200
+TAMANHO_PAGINA = 10
+# Entradas no mesmo grupo com até 10 minutos entre si viram um único resumo
+JANELA_RESUMO = 10 * 60 * 10**9
+
+# Notificações guardam (id do modelo, argumentos) e só viram texto ao serem exibidas
+MODELOS_NOTIFICACAO = (
+    "Você foi adicionado ao grupo de '{}'.",
+    "{} entrou no grupo de '{}'.",
+    "{} entraram no grupo de '{}'.",
+)
+NOTIF_ADICIONADO, NOTIF_ENTROU, NOTIF_RESUMO_ENTRADAS = range(len(MODELOS_NOTIFICACAO))
+NOMES_NO_RESUMO = 3
+
+def formatar_notificacao(modelo, args):
+    if modelo == NOTIF_RESUMO_ENTRADAS:
+        materia, nomes, total = args
+        extra = f" e mais {total - len(nomes)}" if total > len(nomes) else ""
+        return MODELOS_NOTIFICACAO[modelo].format(", ".join(nomes) + extra, materia)
+    return MODELOS_NOTIFICACAO[modelo].format(*args)
 
 class Notificacao:
-    def __init__(self, mensagem, lida=False):
-        self.mensagem = mensagem
+    __slots__ = ("modelo", "args", "lida", "seq", "quantidade")
+
+    def __init__(self, modelo, args, lida=False, seq=0):
+        self.modelo = modelo
+        self.args = args
         self.lida = lida
+        self.seq = seq
+        self.quantidade = 1
+
+    @property
+    def mensagem(self):
+        return formatar_notificacao(self.modelo, self.args)
+
+    def materia_da_entrada(self):
+        if self.modelo == NOTIF_ENTROU:
+            return self.args[1]
+        if self.modelo == NOTIF_RESUMO_ENTRADAS:
+            return self.args[0]
+        return None
+
+class CaixaDeEntrada:
+    # Ring buffer de notificações com contador de não lidas mantido em O(1).
+    # "Marcar todas como lidas" só move uma marca d'água de seq, sem visitar os itens
+    __slots__ = ("itens", "nao_lidas", "lidas_ate", "maior_seq", "posicoes")
+
+    def __init__(self, capacidade=CAPACIDADE_CAIXA):
+        self.itens = deque(maxlen=capacidade)
+        self.nao_lidas = 0
+        self.lidas_ate = 0
+        # Os eventos buscados depois entram atrás dos itens já existentes,
+        # então o último item não é necessariamente o de maior seq
+        self.maior_seq = 0
+        # Matéria -> próxima posição do log do grupo ainda não trazida para a caixa
+        self.posicoes = {}
+
+    def lida(self, n):
+        return n.lida or n.seq <= self.lidas_ate
+
+    def adicionar(self, n):
+        if n.seq > self.maior_seq:
+            self.maior_seq = n.seq
+        if self.itens and self._resumir(self.itens[-1], n):
+            return
+        if len(self.itens) == self.itens.maxlen:
+            descartada = self.itens[0]
+            if not self.lida(descartada):
+                self.nao_lidas -= descartada.quantidade
+        self.itens.append(n)
+        if not self.lida(n):
+            self.nao_lidas += n.quantidade
+
+    def _resumir(self, ultima, n):
+        materia = ultima.materia_da_entrada()
+        if (n.modelo != NOTIF_ENTROU or materia is None or n.args[1] != materia
+                or self.lida(ultima) != self.lida(n) or n.seq - ultima.seq > JANELA_RESUMO):
+            return False
+        if ultima.modelo == NOTIF_ENTROU:
+            ultima.modelo = NOTIF_RESUMO_ENTRADAS
+            ultima.args = (materia, (ultima.args[0],), 1)
+        _, nomes, total = ultima.args
+        if len(nomes) < NOMES_NO_RESUMO:
+            nomes += (n.args[0],)
+        ultima.args = (materia, nomes, total + 1)
+        ultima.quantidade += 1
+        ultima.seq = n.seq
+        if not self.lida(n):
+            self.nao_lidas += 1
+        return True
+
+    def pagina(self, numero, tamanho=TAMANHO_PAGINA):
+        # Mais recentes primeiro
+        total_paginas = max(1, -(-len(self.itens) // tamanho))
+        inicio = numero * tamanho
+        return list(islice(reversed(self.itens), inicio, inicio + tamanho)), total_paginas
+
+    def marcar_todas_lidas(self):
+        if self.itens:
+            self.lidas_ate = max(self.lidas_ate, self.maior_seq)
+        self.nao_lidas = 0
 
 class Grupo:
-    def __init__(self, materia):
-        self.materia = materia
-        self.membros = []
+    __slots__ = ("materia", "total_eventos")
 
-    def adicionar_membro(self, perfil):
-        if perfil not in self.membros:
-            self.membros.append(perfil)
-            perfil.notificacoes.append(Notificacao(f"Você foi adicionado ao grupo de '{self.materia}'."))
-            for m in self.membros:
-                if m != perfil:
-                    m.notificacoes.append(Notificacao(f"{perfil.nome} entrou no grupo de '{self.materia}'."))
+    def __init__(self, materia, total_eventos=0):
+        self.materia = materia
+        # O log de eventos e os membros ficam no ArmazenamentoGrupos;
+        # cada membro guarda só um cursor de leitura
+        self.total_eventos = total_eventos
+
+    def adicionar_membro(self, perfil, armazenamento):
+        entrada = armazenamento.adicionar_membro(
+            self.materia, perfil.ra,
+            (NOTIF_ENTROU, (perfil.nome, self.materia)),
+            (NOTIF_ADICIONADO, (self.materia,))
+        )
+        if entrada is None:
+            return False
+        self.total_eventos, seq = entrada
+        caixa = perfil.caixa()
+        caixa.adicionar(Notificacao(NOTIF_ADICIONADO, (self.materia,), seq=seq))
+        caixa.posicoes[self.materia] = self.total_eventos
+        perfil.cursores_grupos()[self.materia] = [self.total_eventos, self.total_eventos]
+        return True
 
 class Perfil:
-    def __init__(self, nome, ra, email, materias=None, amigos=None, grupos=0):
+    __slots__ = ("nome", "ra", "email", "materias_interesse", "mascara_materias",
+                 "amigos", "grupos_participados", "notificacoes", "cursores", "versao")
+
+    def __init__(self, nome, ra, email, materias=None, amigos=None, grupos=0, versao=0):
         self.nome = nome
         self.ra = ra
         self.email = email
         self.materias_interesse = materias if materias else []
+        # Mesmas matérias como bitmask (um bit por id de matéria, atribuído pelo Sistema)
+        self.mascara_materias = 0
         self.amigos = amigos if amigos else []
         self.grupos_participados = grupos
-        self.notificacoes = []
+        # Caixa de entrada criada só quando o perfil recebe ou consulta notificações
+        self.notificacoes = None
+        # Cursores de leitura dos grupos ({matéria: [entrada, lido]}): também sob demanda,
+        # só o usuário que fez login precisa deles
+        self.cursores = None
+        self.versao = versao
+
+    def caixa(self):
+        if self.notificacoes is None:
+            self.notificacoes = CaixaDeEntrada()
+        return self.notificacoes
+
+    def cursores_grupos(self):
+        if self.cursores is None:
+            self.cursores = {}
+        return self.cursores
 
     def mostrar_dashboard(self, sistema):
         print(f"\n📊 DASHBOARD DE {self.nome.upper()}")
@@ -45,33 +180,29 @@ class Perfil:
         else:
             print("  Nenhum amigo adicionado.")
         print(f"🧩 Grupos participados: {self.grupos_participados}")
-        print(f"🔔 Notificações não lidas: {sum(1 for n in self.notificacoes if not n.lida)}")
+        print(f"🔔 Notificações não lidas: {self.notificacoes_nao_lidas(sistema)}")
         print("-" * 40)
 
-    def salvar(self, todos):
-        for i, u in enumerate(todos):
-            if u.ra == self.ra:
-                todos[i] = self
-                break
-        else:
-            todos.append(self)
-
-        with open(ARQUIVO_CSV, "w", newline='', encoding='utf-8') as f:
-            writer = csv.writer(f)
-            writer.writerow(["ra", "nome", "email", "materias", "amigos", "grupos"])
-            for u in todos:
-                writer.writerow([
-                    u.ra,
-                    u.nome,
-                    u.email,
-                    ";".join(u.materias_interesse),
-                    ";".join(u.amigos),
-                    u.grupos_participados
-                ])
+    def salvar(self, sistema):
+        sistema.adicionar_usuario(self)
+        sistema.marcar_alterado(self)
+
+    def alterar_nome(self, nome, sistema):
+        if nome != self.nome:
+            self.nome = nome
+            sistema.marcar_alterado(self)
+
+    def alterar_email(self, email, sistema):
+        if email != self.email:
+            self.email = email
+            sistema.marcar_alterado(self)
 
     def adicionar_materia(self, materia, sistema):
         if materia not in self.materias_interesse:
+            materia = sys.intern(materia)
             self.materias_interesse.append(materia)
+            sistema.indexar_materia(self, materia)
+            sistema.marcar_alterado(self)
             sistema.adicionar_usuario_ao_grupo(self, materia)
 
     def adicionar_amigo(self, ra_amigo, sistema):
@@ -79,7 +210,7 @@ class Perfil:
             print("⚠️ Você não pode se adicionar como amigo.")
             return
 
-        if ra_amigo in self.amigos:
+        if sistema.sao_amigos(self.ra, ra_amigo):
             print("ℹ️ Esse usuário já está na sua lista de amigos.")
             return
 
@@ -89,24 +220,26 @@ class Perfil:
             return
 
         self.amigos.append(ra_amigo)
-        if self.ra not in amigo.amigos:
+        if not sistema.sao_amigos(ra_amigo, self.ra):
             amigo.amigos.append(self.ra)
+        sistema.ligar_amigos(self.ra, ra_amigo)
         print(f"✅ {amigo.nome} agora é seu amigo!")
 
-        self.salvar(sistema.usuarios)
-        amigo.salvar(sistema.usuarios)
+        sistema.marcar_alterado(self)
+        sistema.marcar_alterado(amigo)
 
     def remover_amigo(self, ra_amigo, sistema):
-        if ra_amigo in self.amigos:
+        if sistema.sao_amigos(self.ra, ra_amigo):
             self.amigos.remove(ra_amigo)
+            sistema.marcar_alterado(self)
             amigo = sistema.buscar_usuario(ra_amigo)
-            if amigo and self.ra in amigo.amigos:
+            if amigo and sistema.sao_amigos(ra_amigo, self.ra):
                 amigo.amigos.remove(self.ra)
-                amigo.salvar(sistema.usuarios)
+                sistema.marcar_alterado(amigo)
+            sistema.desligar_amigos(self.ra, ra_amigo)
             print(f"👋 Amizade com {ra_amigo} removida.")
         else:
             print("⚠️ RA não está na sua lista de amigos.")
-        self.salvar(sistema.usuarios)
 
     def ver_amigos(self, sistema):
         while True:
@@ -124,6 +257,10 @@ class Perfil:
             print("\n1. Adicionar amigo")
             print("2. Remover amigo")
             print("3. Ver matérias em comum")
+            print("4. Relatório de matérias em comum com todos os amigos")
+            print("5. Ver amigos em comum com um RA")
+            print("6. Ver amigos de amigos")
+            print("7. Ver grau de separação até um RA")
             print("0. Voltar")
 
             op = input("Escolha uma opção: ").strip()
@@ -138,72 +275,470 @@ class Perfil:
                 if not self.amigos:
                     print("Você não tem amigos para comparar.")
                     continue
-                for ra in self.amigos:
-                    amigo = sistema.buscar_usuario(ra)
-                    if amigo:
-                        comuns = set(self.materias_interesse) & set(amigo.materias_interesse)
-                        print(f"\n📘 Matérias em comum com {amigo.nome} ({ra}):")
-                        if comuns:
-                            for m in comuns:
-                                print(f" - {m}")
-                        else:
-                            print("Nenhuma matéria em comum.")
+                for amigo, comuns in sistema.materias_em_comum(self):
+                    print(f"\n📘 Matérias em comum com {amigo.nome} ({amigo.ra}):")
+                    if comuns:
+                        for m in comuns:
+                            print(f" - {m}")
+                    else:
+                        print("Nenhuma matéria em comum.")
+            elif op == "4":
+                if not self.amigos:
+                    print("Você não tem amigos para comparar.")
+                    continue
+                relatorio = sistema.relatorio_materias_comuns(self)
+                print(f"\n📊 Matérias em comum entre você e seus {relatorio['amigos']} amigos:")
+                if not relatorio["por_materia"]:
+                    print("Nenhuma matéria em comum.")
+                for m, quantidade in relatorio["por_materia"]:
+                    print(f" - {m}: {quantidade} amigo(s)")
+                if relatorio["todos"]:
+                    print(f"Em comum com todos: {', '.join(relatorio['todos'])}")
+            elif op == "5":
+                ra_outro = input("RA do outro usuário: ").strip()
+                comuns = sistema.amigos_em_comum(self.ra, ra_outro)
+                print(f"\n👥 Amigos em comum com {sistema.buscar_nome_por_ra(ra_outro)}:")
+                if comuns:
+                    for ra in comuns:
+                        print(f" - {sistema.buscar_nome_por_ra(ra)} ({ra})")
+                else:
+                    print("Nenhum amigo em comum.")
+            elif op == "6":
+                print("\n🔗 Amigos de amigos:")
+                sugestoes = sistema.amigos_de_amigos(self.ra)
+                if sugestoes:
+                    for ra, mutuos in sugestoes:
+                        print(f" - {sistema.buscar_nome_por_ra(ra)} ({ra}) | {mutuos} amigo(s) em comum")
+                else:
+                    print("Nenhum amigo de amigo encontrado.")
+            elif op == "7":
+                ra_destino = input("RA de destino: ").strip()
+                caminho = sistema.caminho_entre(self.ra, ra_destino)
+                if caminho is None:
+                    print("Nenhuma ligação encontrada entre vocês.")
+                else:
+                    print(f"\n🧭 Grau de separação: {len(caminho) - 1}")
+                    print(" -> ".join(sistema.buscar_nome_por_ra(ra) for ra in caminho))
             elif op == "0":
                 break
             else:
                 print("Opção inválida.")
         print("-" * 40)
 
-    def ver_notificacoes(self):
+    def ver_sugestoes(self, sistema):
+        print("\n🤝 SUGESTÕES DE PARCEIROS DE ESTUDO:")
+        sugestoes = sistema.sugerir_parceiros(self)
+        if not sugestoes:
+            print("Nenhuma sugestão no momento.")
+        else:
+            for u, comuns in sugestoes:
+                print(f"- {u.nome} ({u.ra}) | {comuns} matéria(s) em comum")
+        print("-" * 40)
+
+    def notificacoes_nao_lidas(self, sistema):
+        sistema.atualizar_grupos(self)
+        return self.caixa().nao_lidas
+
+    def ver_notificacoes(self, sistema):
+        sistema.atualizar_grupos(self)
+        caixa = self.caixa()
+
         print("\n🔔 NOTIFICAÇÕES:")
-        if not self.notificacoes:
+        if not caixa.itens:
             print("Nenhuma notificação.")
-        else:
-            for i, n in enumerate(self.notificacoes, 1):
-                print(f"{i}. {'✔' if n.lida else '❗'} {n.mensagem}")
-                n.lida = True
+        numero = 0
+        while caixa.itens:
+            itens, total_paginas = caixa.pagina(numero)
+            for i, n in enumerate(itens, numero * TAMANHO_PAGINA + 1):
+                print(f"{i}. {'✔' if caixa.lida(n) else '❗'} {n.mensagem}")
+            if total_paginas == 1:
+                break
+            print(f"Página {numero + 1}/{total_paginas} | n: próxima, p: anterior, número: ir para página, Enter: voltar")
+            op = input("Escolha uma opção: ").strip().lower()
+            if op == "n" and numero + 1 < total_paginas:
+                numero += 1
+            elif op == "p" and numero > 0:
+                numero -= 1
+            elif op.isdigit() and 1 <= int(op) <= total_paginas:
+                numero = int(op) - 1
+            elif not op:
+                break
+        sistema.marcar_notificacoes_lidas(self)
         print("-" * 40)
 
 class Sistema:
-    def __init__(self):
+    def __init__(self, journal=True, intervalo_flush=30.0, max_operacoes=20, preguicoso=False,
+                 concorrente=False, formato="csv"):
+        arquivo = ARQUIVO_SQLITE if formato == "sqlite" else ARQUIVO_CSV
+        self.armazenamento = FORMATOS[formato](arquivo, journal=journal, preguicoso=preguicoso,
+                                               concorrente=concorrente)
+        # Em modo preguiçoso os perfis são materializados sob demanda em buscar_usuario
+        self._completo = not preguicoso
+        self.intervalo_flush = intervalo_flush
+        self.max_operacoes = max_operacoes
+        self._alterados = {}
+        self._removidos = set()
+        self._operacoes = 0
+        self._ultimo_flush = time.monotonic()
         self.usuarios = self.carregar_usuarios()
+        self.armazenamento_grupos = ArmazenamentoGrupos(os.path.splitext(ARQUIVO_CSV)[0] + "_grupos.db")
+        # Só os grupos do usuário logado são carregados (carregar_sessao)
         self.grupos = {}
+        self._por_ra = {u.ra: u for u in self.usuarios}
+        self._posicoes = {u.ra: i for i, u in enumerate(self.usuarios)}
+        self._indice_materias = defaultdict(set)
+        self._ids_materias = {}
+        self._nomes_materias = []
+        # Grafo de amizades: RA -> conjunto de RAs (espelha Perfil.amigos). Cada amizade fica
+        # guardada duas vezes (lista no perfil, em ordem, e set aqui): é o maior custo de
+        # memória do Sistema (bench_memoria), em troca de sao_amigos O(1) e da BFS
+        self._grafo = {}
+        for u in self.usuarios:
+            self._indexar_materias(u)
+            self._grafo[u.ra] = set(u.amigos)
 
     def carregar_usuarios(self):
-        usuarios = []
-        if not os.path.exists(ARQUIVO_CSV):
-            return usuarios
-
-        with open(ARQUIVO_CSV, "r", newline='', encoding='utf-8') as f:
-            reader = csv.DictReader(f)
-            for row in reader:
-                usuarios.append(Perfil(
-                    row["nome"],
-                    row["ra"],
-                    row["email"],
-                    row["materias"].split(";") if row["materias"] else [],
-                    row["amigos"].split(";") if row["amigos"] else [],
-                    int(row["grupos"])
-                ))
-        return usuarios
+        if not self._completo:
+            self.armazenamento.abrir()
+            return []
+        return [self._perfil_de_linha(linha) for linha in self.armazenamento.carregar()]
+
+    @staticmethod
+    def _perfil_de_linha(linha):
+        # RAs e matérias se repetem em milhares de linhas: internar evita uma cópia por ocorrência
+        intern = sys.intern
+        ra, nome, email, materias, amigos, grupos, versao = linha
+        return Perfil(
+            nome,
+            intern(ra),
+            email,
+            [intern(m) for m in materias.split(";")] if materias else [],
+            [intern(a) for a in amigos.split(";")] if amigos else [],
+            int(grupos),
+            int(versao)
+        )
 
     def buscar_usuario(self, ra):
-        for u in self.usuarios:
-            if u.ra == ra:
-                return u
+        usuario = self._por_ra.get(ra)
+        if usuario is None and not self._completo and ra not in self._removidos:
+            linha = self.armazenamento.ler(ra)
+            if linha is not None:
+                usuario = self._perfil_de_linha(linha)
+                self.adicionar_usuario(usuario)
+        return usuario
+
+    def adicionar_usuario(self, usuario):
+        i = self._posicoes.get(usuario.ra)
+        if i is None:
+            self._posicoes[usuario.ra] = len(self.usuarios)
+            self.usuarios.append(usuario)
+        else:
+            anterior = self.usuarios[i]
+            if anterior is not usuario:
+                self._desindexar_materias(anterior)
+            self.usuarios[i] = usuario
+        self._por_ra[usuario.ra] = usuario
+        self._indexar_materias(usuario)
+        self._grafo[usuario.ra] = set(usuario.amigos)
+
+    def remover_usuario(self, ra):
+        self.buscar_usuario(ra)
+        if not self._descartar(ra):
+            return False
+        self._alterados.pop(ra, None)
+        self._removidos.add(ra)
+        self._operacoes += 1
+        return True
+
+    def _descartar(self, ra):
+        i = self._posicoes.pop(ra, None)
+        if i is None:
+            return False
+        self._desindexar_materias(self._por_ra.pop(ra))
+        for vizinho in self._grafo.pop(ra, ()):
+            self._grafo.get(vizinho, set()).discard(ra)
+        # Troca com o último para remover em O(1) sem deslocar a lista
+        ultimo = self.usuarios.pop()
+        if i < len(self.usuarios):
+            self.usuarios[i] = ultimo
+            self._posicoes[ultimo.ra] = i
+        return True
+
+    def _aplicar_externos(self, atualizacoes):
+        # Gravações de outros processos (ou o merge delas com as nossas) chegando no flush
+        for ra, linha in atualizacoes.items():
+            usuario = self._por_ra.get(ra)
+            if linha is None:
+                self._descartar(ra)
+            elif usuario is None:
+                if self._completo:
+                    self.adicionar_usuario(self._perfil_de_linha(linha))
+            else:
+                novo = self._perfil_de_linha(linha)
+                self._desindexar_materias(usuario)
+                usuario.nome = novo.nome
+                usuario.email = novo.email
+                usuario.materias_interesse = novo.materias_interesse
+                usuario.amigos = novo.amigos
+                usuario.grupos_participados = novo.grupos_participados
+                usuario.versao = novo.versao
+                self._indexar_materias(usuario)
+                self._grafo[ra] = set(usuario.amigos)
+
+    def indexar_materia(self, usuario, materia):
+        self._indice_materias[materia].add(usuario.ra)
+        usuario.mascara_materias |= 1 << self._id_materia(materia)
+
+    def _indexar_materias(self, usuario):
+        usuario.mascara_materias = 0
+        for materia in usuario.materias_interesse:
+            self.indexar_materia(usuario, materia)
+
+    def _id_materia(self, materia):
+        id_materia = self._ids_materias.get(materia)
+        if id_materia is None:
+            id_materia = self._ids_materias[materia] = len(self._nomes_materias)
+            self._nomes_materias.append(materia)
+        return id_materia
+
+    def materias_da_mascara(self, mascara):
+        nomes = []
+        while mascara:
+            bit = mascara & -mascara
+            nomes.append(self._nomes_materias[bit.bit_length() - 1])
+            mascara ^= bit
+        return nomes
+
+    def _amigos_de(self, usuario):
+        return [a for a in map(self.buscar_usuario, usuario.amigos) if a]
+
+    def materias_em_comum(self, usuario):
+        mascara = usuario.mascara_materias
+        return [(a, self.materias_da_mascara(mascara & a.mascara_materias))
+                for a in self._amigos_de(usuario)]
+
+    def relatorio_materias_comuns(self, usuario):
+        amigos = self._amigos_de(usuario)
+        contagem = Counter()
+        todos = usuario.mascara_materias
+        for a in amigos:
+            comum = usuario.mascara_materias & a.mascara_materias
+            todos &= comum
+            while comum:
+                bit = comum & -comum
+                contagem[bit] += 1
+                comum ^= bit
+        por_materia = [(self._nomes_materias[bit.bit_length() - 1], n)
+                       for bit, n in contagem.most_common()]
+        return {
+            "amigos": len(amigos),
+            "por_materia": por_materia,
+            "todos": self.materias_da_mascara(todos) if amigos else []
+        }
+
+    def sobreposicao_entre_pares(self, ras):
+        perfis = [u for u in map(self.buscar_usuario, ras) if u]
+        return {
+            (a.ra, b.ra): (a.mascara_materias & b.mascara_materias).bit_count()
+            for i, a in enumerate(perfis)
+            for b in perfis[i + 1:]
+        }
+
+    def _desindexar_materias(self, usuario):
+        for materia in usuario.materias_interesse:
+            ras = self._indice_materias.get(materia)
+            if ras is not None:
+                ras.discard(usuario.ra)
+                if not ras:
+                    del self._indice_materias[materia]
+
+    def sugerir_parceiros(self, usuario, k=5):
+        # Pontua só quem aparece nas listas invertidas das matérias do usuário. No modo
+        # preguiçoso os não materializados são contados pelo armazenamento, sem carregar
+        # perfis; os materializados, pelo índice em memória (que tem o que ainda não foi gravado)
+        excluidos = set(usuario.amigos)
+        excluidos.add(usuario.ra)
+        pontos = Counter()
+        if not self._completo:
+            for ra, comuns in self.armazenamento.contar_materias(usuario.materias_interesse).items():
+                if ra not in self._por_ra and ra not in self._removidos and ra not in excluidos:
+                    pontos[ra] = comuns
+        for materia in usuario.materias_interesse:
+            for ra in self._indice_materias.get(materia, ()):
+                if ra not in excluidos:
+                    pontos[ra] += 1
+        melhores = heapq.nlargest(k, pontos.items(), key=lambda item: item[1])
+        sugestoes = [(self.buscar_usuario(ra), comuns) for ra, comuns in melhores]
+        return [(u, comuns) for u, comuns in sugestoes if u]
+
+    def sao_amigos(self, ra, ra_amigo):
+        return ra_amigo in self._grafo.get(ra, ())
+
+    def ligar_amigos(self, ra_a, ra_b):
+        self._grafo.setdefault(ra_a, set()).add(ra_b)
+        self._grafo.setdefault(ra_b, set()).add(ra_a)
+
+    def desligar_amigos(self, ra_a, ra_b):
+        self._grafo.get(ra_a, set()).discard(ra_b)
+        self._grafo.get(ra_b, set()).discard(ra_a)
+
+    def amigos_em_comum(self, ra_a, ra_b):
+        self.buscar_usuario(ra_a)
+        self.buscar_usuario(ra_b)
+        return self._grafo.get(ra_a, set()) & self._grafo.get(ra_b, set())
+
+    def amigos_de_amigos(self, ra, k=10):
+        amigos = self._grafo.get(ra, set())
+        mutuos = Counter()
+        for amigo in amigos:
+            self.buscar_usuario(amigo)
+            for candidato in self._grafo.get(amigo, ()):
+                if candidato != ra and candidato not in amigos:
+                    mutuos[candidato] += 1
+        return mutuos.most_common(k)
+
+    def caminho_entre(self, origem, destino, max_saltos=6):
+        # BFS bidirecional: expande sempre a menor fronteira (amizades são simétricas).
+        # No modo preguiçoso as amizades de cada fronteira vêm do armazenamento (_vizinhos)
+        if not (self.buscar_usuario(origem) and self.buscar_usuario(destino)):
+            return None
+        if origem == destino:
+            return [origem]
+        pais_origem, pais_destino = {origem: None}, {destino: None}
+        fronteira_origem, fronteira_destino = [origem], [destino]
+        for _ in range(max_saltos):
+            if not fronteira_origem or not fronteira_destino:
+                return None
+            if len(fronteira_origem) <= len(fronteira_destino):
+                fronteira_origem, encontro = self._expandir(fronteira_origem, pais_origem, pais_destino)
+            else:
+                fronteira_destino, encontro = self._expandir(fronteira_destino, pais_destino, pais_origem)
+            if encontro is not None:
+                caminho = []
+                ra = encontro
+                while ra is not None:
+                    caminho.append(ra)
+                    ra = pais_origem[ra]
+                caminho.reverse()
+                ra = pais_destino[encontro]
+                while ra is not None:
+                    caminho.append(ra)
+                    ra = pais_destino[ra]
+                return caminho
         return None
 
+    def _vizinhos(self, fronteira):
+        if self._completo:
+            return self._grafo
+        vizinhos = {ra: self._grafo[ra] for ra in fronteira if ra in self._por_ra}
+        faltando = [ra for ra in fronteira if ra not in vizinhos and ra not in self._removidos]
+        # Adicionar ou remover amigo materializa os dois perfis, então a lista gravada de quem
+        # não está materializado só pode estar desatualizada quanto a perfis removidos
+        for ra, amigos in self.armazenamento.amigos_de(faltando).items():
+            vizinhos[ra] = [a for a in amigos if a not in self._removidos]
+        return vizinhos
+
+    def _expandir(self, fronteira, pais, pais_outro_lado):
+        vizinhos = self._vizinhos(fronteira)
+        proxima = []
+        for ra in fronteira:
+            for vizinho in vizinhos.get(ra, ()):
+                if vizinho not in pais:
+                    pais[vizinho] = ra
+                    if vizinho in pais_outro_lado:
+                        return proxima, vizinho
+                    proxima.append(vizinho)
+        return proxima, None
+
+    def marcar_alterado(self, usuario):
+        self._alterados[usuario.ra] = usuario
+        self._removidos.discard(usuario.ra)
+        self._operacoes += 1
+
+    def talvez_descarregar(self):
+        if not self._operacoes:
+            return
+        if (self._operacoes >= self.max_operacoes
+                or time.monotonic() - self._ultimo_flush >= self.intervalo_flush):
+            self.descarregar()
+
+    def descarregar(self):
+        if self._operacoes:
+            self.armazenamento.gravar(list(self._alterados.values()), self._removidos, self.usuarios,
+                                      self._aplicar_externos)
+            self._alterados.clear()
+            self._removidos.clear()
+            self._operacoes = 0
+        self._ultimo_flush = time.monotonic()
+
     def buscar_nome_por_ra(self, ra):
         usuario = self.buscar_usuario(ra)
         return usuario.nome if usuario else f"RA {ra} (não encontrado)"
 
+    def grupo(self, materia):
+        grupo = self.grupos.get(materia)
+        if grupo is None:
+            grupo = self.grupos[materia] = Grupo(materia, self.armazenamento_grupos.total_eventos(materia))
+        return grupo
+
     def adicionar_usuario_ao_grupo(self, usuario, materia):
-        if materia not in self.grupos:
-            self.grupos[materia] = Grupo(materia)
-        self.grupos[materia].adicionar_membro(usuario)
+        if self.grupo(materia).adicionar_membro(usuario, self.armazenamento_grupos):
+            usuario.grupos_participados = len(usuario.cursores_grupos())
+            self.marcar_alterado(usuario)
+
+    def carregar_sessao(self, usuario):
+        # Carga preguiçosa: grupos, cursores e notificações só do usuário que fez login
+        cursores = usuario.cursores_grupos()
+        for materia, entrada, lido in self.armazenamento_grupos.grupos_do_usuario(usuario.ra):
+            cursores[materia] = [entrada, lido]
+            self.grupo(materia)
+        usuario.notificacoes = None
+        self.armazenamento_grupos.podar_notificacoes(usuario.ra, CAPACIDADE_CAIXA)
+        pessoais = [Notificacao(modelo, args, lida, seq) for seq, modelo, args, lida in
+                    self.armazenamento_grupos.notificacoes_do_usuario(usuario.ra)]
+        self._preencher_caixa(usuario, [pessoais])
+        self.atualizar_grupos(usuario)
+        # Matérias de antes da persistência dos grupos entram sem gerar notificações
+        for materia in usuario.materias_interesse:
+            if materia not in cursores:
+                total = self.armazenamento_grupos.registrar_membro(materia, usuario.ra)
+                cursores[materia] = [total, total]
+                self.grupo(materia)
+        if usuario.grupos_participados != len(cursores):
+            usuario.grupos_participados = len(cursores)
+            self.marcar_alterado(usuario)
+
+    def atualizar_grupos(self, usuario):
+        # Traz para a caixa só os eventos novos de cada grupo (no máximo uma caixa cheia)
+        caixa = usuario.caixa()
+        fluxos = []
+        for materia, (entrada, lido) in usuario.cursores_grupos().items():
+            grupo = self.grupo(materia)
+            grupo.total_eventos = self.armazenamento_grupos.total_eventos(materia)
+            desde = max(caixa.posicoes.get(materia, entrada), grupo.total_eventos - CAPACIDADE_CAIXA)
+            if desde < grupo.total_eventos:
+                fluxos.append([Notificacao(modelo, args, posicao < lido, seq) for posicao, seq, modelo, args in
+                               self.armazenamento_grupos.eventos(materia, desde)])
+            caixa.posicoes[materia] = grupo.total_eventos
+        self._preencher_caixa(usuario, fluxos)
+
+    def _preencher_caixa(self, usuario, fluxos):
+        caixa = usuario.caixa()
+        for n in heapq.merge(*fluxos, key=lambda n: n.seq):
+            caixa.adicionar(n)
+
+    def marcar_notificacoes_lidas(self, usuario):
+        usuario.caixa().marcar_todas_lidas()
+        cursores = usuario.cursores_grupos()
+        for materia, cursor in cursores.items():
+            cursor[1] = self.grupos[materia].total_eventos
+        self.armazenamento_grupos.marcar_lidas(
+            usuario.ra, {materia: lido for materia, (_, lido) in cursores.items()})
 
 def menu():
-    sistema = Sistema()
+    # Depois de rodar migrar.py os perfis passam a vir do SQLite
+    formato = "sqlite" if os.path.exists(ARQUIVO_SQLITE) else "csv"
+    sistema = Sistema(preguicoso=True, concorrente=True, formato=formato)
 
     ra = input("Digite seu RA: ").strip()
     usuario = sistema.buscar_usuario(ra)
@@ -212,13 +747,20 @@ def menu():
         nome = input("RA não encontrado. Digite seu nome: ")
         email = input("Digite seu email institucional: ")
         usuario = Perfil(nome, ra, email)
-        sistema.usuarios.append(usuario)
+        usuario.salvar(sistema)
         print("✅ Usuário criado com sucesso!")
     else:
         print(f"👋 Bem-vindo de volta, {usuario.nome}!")
 
+    sistema.carregar_sessao(usuario)
     usuario.mostrar_dashboard(sistema)
 
+    try:
+        menu_principal(usuario, sistema)
+    finally:
+        sistema.descarregar()
+
+def menu_principal(usuario, sistema):
     while True:
         print("\n📋 MENU")
         print("1. Alterar nome")
@@ -227,32 +769,35 @@ def menu():
         print("4. Ver amigos (gerenciar e comparar matérias)")
         print("5. Ver notificações")
         print("6. Ver dashboard")
+        print("7. Sugerir parceiros de estudo")
         print("0. Sair")
 
         op = input("Escolha uma opção: ").strip()
 
         if op == "1":
             novo_nome = input("Novo nome: ")
-            usuario.nome = novo_nome
+            usuario.alterar_nome(novo_nome, sistema)
         elif op == "2":
             novo_email = input("Novo email: ")
-            usuario.email = novo_email
+            usuario.alterar_email(novo_email, sistema)
         elif op == "3":
             materia = input("Nome da matéria: ")
             usuario.adicionar_materia(materia, sistema)
         elif op == "4":
             usuario.ver_amigos(sistema)
         elif op == "5":
-            usuario.ver_notificacoes()
+            usuario.ver_notificacoes(sistema)
         elif op == "6":
             usuario.mostrar_dashboard(sistema)
+        elif op == "7":
+            usuario.ver_sugestoes(sistema)
         elif op == "0":
             print("👋 Saindo...")
             break
         else:
             print("❌ Opção inválida.")
 
-        usuario.salvar(sistema.usuarios)
+        sistema.talvez_descarregar()
 
 if __name__ == "__main__":
     menu()
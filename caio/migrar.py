@@ -0,0 +1,52 @@
+# migrar.py
+# Migração única de usuarios.csv (snapshot + journal) para o banco SQLite usuarios.db
+# (rodar com: python migrar.py [origem.csv] [destino.db])
+
+import os
+import sys
+import time
+
+from armazenamento import ArmazenamentoCSV, ArmazenamentoSQLite, linha_valida
+from main import ARQUIVO_CSV, ARQUIVO_SQLITE
+
+
+def _remover_banco(arquivo):
+    for nome in (arquivo, arquivo + "-wal", arquivo + "-shm"):
+        if os.path.exists(nome):
+            os.remove(nome)
+
+
+def migrar(origem=ARQUIVO_CSV, destino=ARQUIVO_SQLITE):
+    if not os.path.exists(origem):
+        return False, f"❌ Arquivo '{origem}' não encontrado."
+    if os.path.exists(destino):
+        return False, f"❌ '{destino}' já existe; apague-o para migrar de novo."
+    inicio = time.perf_counter()
+    # Carga com trava: nenhum processo grava no CSV enquanto as linhas são copiadas
+    linhas = ArmazenamentoCSV(origem, concorrente=True).carregar()
+    invalidas = [linha[0] for linha in linhas if not linha_valida(linha)]
+    if invalidas:
+        return False, (f"❌ {len(invalidas)} usuário(s) com grupos ou versão inválidos "
+                       f"(primeiro: RA {invalidas[0]}); nada foi migrado.")
+
+    # O menu passa a usar o SQLite assim que destino existe: o banco é montado ao lado
+    # e só ganha o nome final depois do COMMIT, então uma migração interrompida não troca o formato
+    temporario = destino + ".tmp"
+    _remover_banco(temporario)
+    banco = ArmazenamentoSQLite(temporario)
+    try:
+        banco.importar(linhas)
+    except BaseException:
+        banco.fechar()
+        _remover_banco(temporario)
+        raise
+    # Fechar a última conexão faz o checkpoint do WAL: todo o conteúdo fica no arquivo principal
+    banco.fechar()
+    os.replace(temporario, destino)
+    return True, f"✅ {len(linhas)} usuários migrados para '{destino}' em {time.perf_counter() - inicio:.1f}s."
+
+
+if __name__ == "__main__":
+    ok, mensagem = migrar(*sys.argv[1:3])
+    print(mensagem)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,76 @@
+"""
+Micro-benchmarks do fórum (rodar com: python benchmark.py).
+"""
+
+import itertools
+import random
+import time
+
+from forum import QuestionStore
+
+TOPICS = ("calcular derivada integral funcao limite matriz vetor recursao lista "
+          "ponteiro memoria python java classe objeto heranca banco dados consulta "
+          "indice arvore grafo busca ordenacao pilha fila complexidade prova exercicio "
+          "algoritmo codigo erro compilar variavel loop array string").split()
+# Vocabulário com frequências de Zipf, como em texto real: poucas palavras muito
+# comuns e uma cauda longa de termos raros
+WORDS = TOPICS + [f'termo{i}' for i in range(20_000)]
+WEIGHTS = list(itertools.accumulate(1 / rank for rank in range(1, len(WORDS) + 1)))
+
+
+def random_text(rng, n_words):
+    return ' '.join(rng.choices(WORDS, cum_weights=WEIGHTS, k=n_words))
+
+
+def build_store(n_posts, seed=1):
+    rng = random.Random(seed)
+    store = QuestionStore()
+    for i in range(n_posts // 2):
+        q = store.add_question(str(rng.randrange(10_000)), f'aluno{i % 500}', random_text(rng, 12))
+        store.add_answer(q.id, f'aluno{rng.randrange(500)}', random_text(rng, 20))
+    return store
+
+
+def bench_search(sizes=(10_000, 100_000), queries=200, seed=2):
+    print("Busca BM25 (top 10):")
+    rng = random.Random(seed)
+    for n in sizes:
+        store = build_store(n)
+        terms = [random_text(rng, 3) for _ in range(queries)]
+        start = time.perf_counter()
+        for query in terms:
+            store.search(query)
+        elapsed = (time.perf_counter() - start) / queries
+        print(f"  {n:>7} postagens: {elapsed * 1e3:7.2f} ms/consulta")
+
+
+def bench_post(sizes=(10_000, 100_000), posts=500, seed=3):
+    # Postagem completa: checagem de duplicatas + registro (índices incluídos)
+    print("Postagem com detecção de duplicatas:")
+    rng = random.Random(seed)
+    for n in sizes:
+        store = QuestionStore()
+        for i in range(n):
+            store.add_question(str(i), 'aluno', random_text(rng, 12))
+        # 1 em cada 5 postagens é uma pergunta existente com uma palavra trocada
+        texts = []
+        for i in range(posts):
+            if i % 5:
+                texts.append(random_text(rng, 12))
+            else:
+                words = store.get(rng.randrange(1, n + 1)).text.split()
+                words[rng.randrange(len(words))] = random_text(rng, 1)
+                texts.append(' '.join(words))
+        start = time.perf_counter()
+        duplicates = 0
+        for text in texts:
+            similar, signature = store.similar(text)
+            duplicates += bool(similar)
+            store.add_question('0', 'aluno', text, signature)
+        elapsed = (time.perf_counter() - start) / posts
+        print(f"  {n:>7} perguntas: {elapsed * 1e3:7.3f} ms/postagem ({duplicates}/{posts} com sugestões)")
+
+
+if __name__ == "__main__":
+    bench_search()
+    bench_post()
@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+
+"""
+Cliente de terminal para o modo servidor do fórum.
+Usa o mesmo menu do forum.py; só troca o armazenamento local por requisições ao servidor.
+Rodar com: python client.py [--host H] [--port P] ou python client.py --unix CAMINHO
+"""
+
+import argparse
+import json
+import socket
+
+from forum import PAGE_SIZE, Answer, Question, run_menu
+from server import DEFAULT_HOST, DEFAULT_PORT
+
+
+def to_question(data):
+    answers = data['answers']
+    if isinstance(answers, int):
+        # Listagens só transmitem o número de respostas; range(n) tem o mesmo len()
+        answers = range(answers)
+    else:
+        answers = [Answer(user, text) for user, text in answers]
+    return Question(data['id'], data['ra'], data['user'], data['text'], answers)
+
+
+class RemoteStore:
+    """
+    Mesma interface de QuestionStore usada pelo menu, atendida pelo servidor.
+    """
+
+    def __init__(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix=None):
+        if unix:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.connect(unix)
+        else:
+            self.sock = socket.create_connection((host, port))
+        self.file = self.sock.makefile('rwb')
+
+    def request(self, op, **fields):
+        fields['op'] = op
+        self.file.write((json.dumps(fields, ensure_ascii=False) + '\n').encode('utf-8'))
+        self.file.flush()
+        line = self.file.readline()
+        if not line:
+            raise ConnectionError("Conexão com o servidor encerrada.")
+        return json.loads(line)
+
+    def close(self):
+        self.file.close()
+        self.sock.close()
+
+    def __len__(self):
+        return self.request('list', size=0)['total']
+
+    def count(self, ordering):
+        return self.request('list', ordering=ordering, size=0)['total']
+
+    def page(self, ordering, cursor, size):
+        response = self.request('list', ordering=ordering, cursor=cursor or '', size=size)
+        return [to_question(q) for q in response['questions']], response['cursor']
+
+    def add_question(self, ra, user, text, signature=None):
+        # A assinatura MinHash é recalculada no servidor
+        return to_question(self.request('post', ra=ra, user=user, text=text)['question'])
+
+    def add_answer(self, qid, user, text):
+        response = self.request('answer', qid=qid, user=user, text=text)
+        return Answer(user, text) if response['ok'] else None
+
+    def similar(self, text, k=5):
+        response = self.request('similar', text=text)
+        return [(score, to_question(q)) for score, q in response['similar']], None
+
+    def get(self, qid):
+        response = self.request('view', qid=qid)
+        return to_question(response['question']) if response['ok'] else None
+
+    def by_ra(self, ra):
+        return [to_question(q) for q in self.request('view', ra=ra)['questions']]
+
+    def search(self, query, k=10):
+        response = self.request('search', query=query, k=k)
+        return [(score, to_question(q)) for score, q in response['results']]
+
+    def oldest_unanswered(self, k=PAGE_SIZE):
+        return [to_question(q) for q in self.request('unanswered', k=k)['questions']]
+
+    def top_contributors(self, k=PAGE_SIZE):
+        return [tuple(entry) for entry in self.request('top', k=k)['top']]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente do fórum de perguntas e respostas")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="caminho de um socket Unix (em vez de TCP)")
+    args = parser.parse_args()
+
+    try:
+        store = RemoteStore(args.host, args.port, args.unix)
+    except OSError as e:
+        print(f"Não foi possível conectar ao servidor: {e}")
+        return
+    try:
+        run_menu(store)
+    finally:
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
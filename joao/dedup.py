@@ -0,0 +1,89 @@
+"""
+Detecção de perguntas quase duplicadas com MinHash + LSH.
+As assinaturas são mantidas de forma incremental; checar uma pergunta nova só
+compara com as candidatas que caem nos mesmos baldes, não com o fórum inteiro.
+"""
+
+import random
+import zlib
+from operator import eq
+
+from search import tokenize
+
+SHINGLE = 4
+NUM_HASHES = 60
+BANDS = 12
+THRESHOLD = 0.6
+
+_EMPTY = 1 << 32
+# Ordem fixa (igual para todos os textos) em que cada compartimento vazio procura um
+# preenchido; sorteada por compartimento para que vazios vizinhos não copiem o mesmo valor
+_PROBES = [random.Random(i).sample(range(NUM_HASHES), NUM_HASHES) for i in range(NUM_HASHES)]
+
+
+def shingles(text):
+    # 4-gramas de caracteres do texto normalizado (sem acento, sem stopwords):
+    # tolera erros de digitação e pequenas mudanças de ordem
+    normalized = ' '.join(tokenize(text))
+    if len(normalized) <= SHINGLE:
+        return {normalized} if normalized else set()
+    return {normalized[i:i + SHINGLE] for i in range(len(normalized) - SHINGLE + 1)}
+
+
+def signature(text):
+    # MinHash de uma permutação só: cada shingle é espalhado uma vez e cai num
+    # compartimento, que guarda o menor valor; compartimentos vazios copiam um
+    # preenchido (densificação). O custo é O(shingles), não O(shingles * hashes)
+    bins = [_EMPTY] * NUM_HASHES
+    for s in shingles(text):
+        h = (zlib.crc32(s.encode('utf-8')) * 0x9E3779B1) & 0xFFFFFFFF
+        i, value = h % NUM_HASHES, h // NUM_HASHES
+        if value < bins[i]:
+            bins[i] = value
+    if all(v == _EMPTY for v in bins):
+        return None
+    dense = []
+    for i, value in enumerate(bins):
+        if value == _EMPTY:
+            value = next(bins[j] for j in _PROBES[i] if bins[j] != _EMPTY)
+        dense.append(value)
+    return tuple(dense)
+
+
+class DuplicateDetector:
+    def __init__(self, bands=BANDS, threshold=THRESHOLD):
+        self.bands = bands
+        self.rows = NUM_HASHES // bands
+        self.threshold = threshold
+        self.signatures = {}
+        # Um dicionário por banda: fatia da assinatura -> ids das perguntas
+        self.buckets = [{} for _ in range(bands)]
+
+    def _band_keys(self, sig):
+        rows = self.rows
+        return [sig[b * rows:(b + 1) * rows] for b in range(self.bands)]
+
+    def add(self, qid, text, sig=None):
+        sig = sig or signature(text)
+        if sig is None:
+            return
+        self.signatures[qid] = sig
+        for bucket, key in zip(self.buckets, self._band_keys(sig)):
+            bucket.setdefault(key, []).append(qid)
+
+    def similar(self, text, k=5):
+        # Devolve ([(similaridade estimada, id)], assinatura), mais parecidas primeiro
+        sig = signature(text)
+        if sig is None:
+            return [], None
+        candidates = set()
+        for bucket, key in zip(self.buckets, self._band_keys(sig)):
+            candidates.update(bucket.get(key, ()))
+        found = []
+        for qid in candidates:
+            other = self.signatures[qid]
+            score = sum(map(eq, sig, other)) / NUM_HASHES
+            if score >= self.threshold:
+                found.append((score, qid))
+        found.sort(reverse=True)
+        return found[:k], sig
@@ -3,12 +3,245 @@
 """
 Sistema de fórum de perguntas e respostas em terminal.
 Objetivo: permitir que alunos postem perguntas e respostas de forma colaborativa.
-As perguntas são identificadas pelo RA do autor.
+Cada pergunta recebe um id estável; o RA do autor continua servindo para encontrá-la.
+Para vários alunos ao mesmo tempo, use server.py com client.py (mesmo menu).
 """
 
+import bisect
+import sys
+from collections import defaultdict
+
+from dedup import DuplicateDetector
+from rankings import RankedCounter
+from search import SearchIndex
+from storage import ForumLog
+
+# Arquivos de dados (forum_snapshot.jsonl e forum_log.jsonl) no diretório atual
+DATA_BASE = 'forum'
+PAGE_SIZE = 10
+
+# Ordenações da listagem paginada
+NEWEST, MOST_ANSWERED, UNANSWERED = 'recentes', 'mais respondidas', 'sem resposta'
+
+
+class Answer:
+    # Registro compacto de resposta (sem __dict__ por instância)
+    __slots__ = ('user', 'text')
+
+    def __init__(self, user, text):
+        self.user = user
+        self.text = text
+
+
+class Question:
+    __slots__ = ('id', 'ra', 'user', 'text', 'answers')
+
+    def __init__(self, qid, ra, user, text, answers=None):
+        self.id = qid
+        self.ra = ra
+        self.user = user
+        self.text = text
+        self.answers = answers if answers is not None else []
+
+
+class QuestionStore:
+    """
+    Armazena as perguntas do fórum.
+    Mantém um mapa id -> pergunta e um índice RA -> [ids], para que a busca
+    por RA seja O(1) e um aluno com várias perguntas consiga acessar todas.
+    Toda alteração passa por apply(event); com um log associado, o evento também
+    é gravado, e o mesmo apply reconstrói o estado na inicialização.
+    """
+
+    def __init__(self, log=None):
+        self.questions = {}
+        self.ids_by_ra = defaultdict(list)
+        self.next_id = 1
+        self.log = log
+        self.index = SearchIndex()
+        self.duplicates = DuplicateDetector()
+        # Índices das listagens: ids em ordem de postagem, ranking por número de
+        # respostas e ids ainda sem resposta (ordenados, os mais antigos primeiro)
+        self.order = []
+        self.answer_counts = RankedCounter()
+        self.unanswered = []
+        # Respostas dadas por usuário (campo `user`), para o ranking de colaboradores
+        self.contributors = RankedCounter()
+
+    def __len__(self):
+        return len(self.questions)
+
+    def __iter__(self):
+        # Ordem de postagem (dicts preservam a ordem de inserção)
+        return iter(self.questions.values())
+
+    def apply(self, event, signature=None):
+        if event['op'] == 'q':
+            question = Question(event['id'], event['ra'], event['user'], event['text'])
+            self.questions[question.id] = question
+            self.ids_by_ra[question.ra].append(question.id)
+            self.next_id = max(self.next_id, question.id + 1)
+            self.index.add(question.id, question.text)
+            self.duplicates.add(question.id, question.text, signature)
+            self.order.append(question.id)
+            self.answer_counts.add(question.id)
+            self.unanswered.append(question.id)
+            return question
+        question = self.questions.get(event['qid'])
+        if question is None:
+            return None
+        answer = Answer(event['user'], event['text'])
+        question.answers.append(answer)
+        self.index.add(question.id, answer.text)
+        if self.answer_counts.increment(question.id) == 1:
+            i = bisect.bisect_left(self.unanswered, question.id)
+            del self.unanswered[i]
+        self.contributors.increment(answer.user)
+        return answer
+
+    def _record(self, event, signature=None):
+        result = self.apply(event, signature)
+        if result is not None and self.log:
+            self.log.append(event)
+        return result
+
+    def add_question(self, ra, user, text, signature=None):
+        # `signature` vem de similar(), para não recalcular o MinHash da mesma pergunta
+        return self._record({'op': 'q', 'id': self.next_id, 'ra': ra, 'user': user, 'text': text},
+                            signature)
+
+    def similar(self, text, k=5):
+        # Perguntas quase iguais já postadas: ([(similaridade, pergunta)], assinatura)
+        found, signature = self.duplicates.similar(text, k)
+        return [(score, self.questions[qid]) for score, qid in found], signature
+
+    def get(self, qid):
+        return self.questions.get(qid)
+
+    def by_ra(self, ra):
+        return [self.questions[qid] for qid in self.ids_by_ra.get(ra, ())]
+
+    def add_answer(self, qid, user, text):
+        return self._record({'op': 'a', 'qid': qid, 'user': user, 'text': text})
+
+    def count(self, ordering):
+        return len(self.unanswered) if ordering == UNANSWERED else len(self.order)
+
+    def page(self, ordering, cursor=None, size=PAGE_SIZE):
+        # Página da ordenação pedida em O(log n + size): ([perguntas], cursor da próxima),
+        # com cursor None na última. O cursor é opaco para quem pagina: id da última
+        # pergunta mostrada (recentes, sem resposta) ou "contagem:posição" (mais respondidas),
+        # então perguntas postadas ou respondidas entre duas páginas não deslocam a listagem
+        if ordering == NEWEST:
+            end = bisect.bisect_left(self.order, parse_cursor(cursor, 1)[0]) if cursor else len(self.order)
+            ids = self.order[max(0, end - size):end][::-1]
+            more = end - size > 0
+        elif ordering == MOST_ANSWERED:
+            start = self.answer_counts.resume(*parse_cursor(cursor, 2)) if cursor else 0
+            ids = self.answer_counts.slice(start, start + size)
+            more = start + size < len(self.answer_counts)
+        else:
+            start = bisect.bisect_right(self.unanswered, parse_cursor(cursor, 1)[0]) if cursor else 0
+            ids = self.unanswered[start:start + size]
+            more = start + size < len(self.unanswered)
+        if not (ids and more):
+            next_cursor = None
+        elif ordering == MOST_ANSWERED:
+            next_cursor = f"{self.answer_counts.count(ids[-1])}:{start + len(ids) - 1}"
+        else:
+            next_cursor = str(ids[-1])
+        return [self.questions[qid] for qid in ids], next_cursor
+
+    def oldest_unanswered(self, k=PAGE_SIZE):
+        # Fila de perguntas sem resposta, as que esperam há mais tempo primeiro: O(k)
+        return [self.questions[qid] for qid in self.unanswered[:k]]
+
+    def top_contributors(self, k=PAGE_SIZE):
+        # [(usuário, respostas dadas)] dos k que mais responderam: O(k)
+        return [(user, self.contributors.count(user)) for user in self.contributors.slice(0, k)]
+
+    def search(self, query, k=10):
+        # Busca BM25 no texto das perguntas e respostas: [(score, pergunta)]
+        return [(score, self.questions[qid]) for score, qid in self.index.search(query, k)]
+
+
+def select_question(store, prompt):
+    # Localiza as perguntas do RA pelo índice; se houver mais de uma, pede o id
+    ra = input(prompt).strip()
+    found = store.by_ra(ra)
+    if not found:
+        print("Pergunta não encontrada para o RA informado.")
+        return None
+    if len(found) == 1:
+        return found[0]
+    print(f"O RA {ra} tem {len(found)} perguntas:")
+    for q in found:
+        print(f"  [{q.id}] {q.text} ({len(q.answers)} respostas)")
+    qid = input("Digite o id da pergunta: ").strip()
+    selected = store.get(int(qid)) if qid.isdigit() else None
+    if selected is None or selected.ra != ra:
+        print("Id inválido.")
+        return None
+    return selected
+
+
+def parse_cursor(cursor, parts):
+    # Cursor de QuestionStore.page: `parts` inteiros não negativos separados por ':'
+    try:
+        values = [int(value) for value in cursor.split(':')]
+    except (AttributeError, ValueError):
+        values = []
+    if len(values) != parts or min(values) < 0:
+        raise ValueError(f"cursor inválido: {cursor!r}")
+    return values
+
+
+def paginate(total, fetch, page_size=PAGE_SIZE):
+    # Mostra uma página por vez; fetch(cursor, tamanho) devolve as linhas da página e o
+    # cursor da seguinte (None na última). Guarda os cursores das páginas já vistas para
+    # voltar a elas. Cada página é escrita de uma vez só no stdout
+    pages = max(1, -(-total // page_size))
+    cursors = [None]
+    page = 0
+    while True:
+        lines, next_cursor = fetch(cursors[page], page_size)
+        # A próxima página é sempre a que segue a página atual como ela está agora
+        del cursors[page + 1:]
+        if next_cursor is not None:
+            cursors.append(next_cursor)
+        lines.append(f"Página {page + 1}/{max(pages, len(cursors))}")
+        sys.stdout.write('\n'.join(lines) + '\n')
+        if len(cursors) == 1:
+            return
+        choice = input("n: próxima, p: anterior, número: voltar à página, Enter: voltar: ").strip().lower()
+        if choice == 'n' and page + 1 < len(cursors):
+            page += 1
+        elif choice == 'p' and page > 0:
+            page -= 1
+        elif choice.isdigit() and 1 <= int(choice) <= len(cursors):
+            page = int(choice) - 1
+        elif not choice:
+            return
+
+
+def ask_page_size():
+    size = input(f"Itens por página (Enter = {PAGE_SIZE}): ").strip()
+    return int(size) if size.isdigit() and int(size) > 0 else PAGE_SIZE
+
+
 def main():
-    # Lista de perguntas: cada pergunta é um dict com RA, user, text, answers
-    questions = []
+    # Perguntas indexadas por id e por RA, recarregadas do disco (snapshot + log)
+    log = ForumLog(DATA_BASE)
+    questions = QuestionStore()
+    log.load(questions)
+    questions.log = log
+    try:
+        run_menu(questions)
+    finally:
+        log.close()
+
+
+def run_menu(questions):
     # Em vez de gerar RA automaticamente, solicitamos RA ao postar pergunta
 
     print("Bem-vindo ao fórum de perguntas e respostas!")
@@ -23,6 +256,9 @@ def main():
         print("3. Responder pergunta")
         print("4. Ver respostas de uma pergunta pelo RA")
         print("5. Trocar usuário")
+        print("6. Buscar perguntas")
+        print("7. Perguntas sem resposta")
+        print("8. Top colaboradores")
         print("0. Sair")
         choice = input("Escolha uma opção: ").strip()
 
@@ -34,38 +270,49 @@ def main():
                 print("RA inválido.")
                 continue
             question_text = input("Digite sua pergunta: ").strip()
-            questions.append({
-                'RA': ra,
-                'user': user,
-                'text': question_text,
-                'answers': []
-            })
-            print(f"Pergunta registrada com RA {ra}.")
+            # Antes de publicar, sugere perguntas parecidas que talvez já tenham resposta
+            similar, signature = questions.similar(question_text)
+            if similar:
+                print("Perguntas parecidas já existentes:")
+                for score, q in similar:
+                    print(f"  [{q.id}] {q.text} ({len(q.answers)} respostas, {score:.0%} parecida)")
+                if input("Publicar mesmo assim? (s/n): ").strip().lower() != 's':
+                    print("Pergunta não publicada.")
+                    continue
+            question = questions.add_question(ra, user, question_text, signature)
+            print(f"Pergunta {question.id} registrada com RA {ra}.")
 
         elif choice == '2':
-            # Listar todas as perguntas
+            # Listar perguntas paginadas, na ordenação escolhida
             if not questions:
                 print("Nenhuma pergunta registrada.")
-            else:
-                print("Perguntas:")
-                for q in questions:
-                    print(f"RA {q['RA']}: ({q['user']}) {q['text']}")
+                continue
+            orderings = {'1': NEWEST, '2': MOST_ANSWERED, '3': UNANSWERED}
+            ordering = orderings.get(input("Ordenar por 1. recentes, 2. mais respondidas, "
+                                           "3. sem resposta: ").strip(), NEWEST)
+            total = questions.count(ordering)
+            if not total:
+                print("Nenhuma pergunta nessa listagem.")
+                continue
+            page_size = ask_page_size()
+            print(f"Perguntas ({ordering}):")
+
+            def question_lines(cursor, size):
+                found, next_cursor = questions.page(ordering, cursor, size)
+                return [f"[{q.id}] RA {q.ra}: ({q.user}) {q.text} ({len(q.answers)} respostas)"
+                        for q in found], next_cursor
+            paginate(total, question_lines, page_size)
 
         elif choice == '3':
             # Responder a uma pergunta existente por RA
             if not questions:
                 print("Nenhuma pergunta disponível para responder.")
                 continue
-            ra = input("Digite o RA da pergunta que deseja responder: ").strip()
-            selected = next((q for q in questions if q['RA'] == ra), None)
+            selected = select_question(questions, "Digite o RA da pergunta que deseja responder: ")
             if not selected:
-                print("Pergunta não encontrada para o RA informado.")
                 continue
             answer_text = input("Digite sua resposta: ").strip()
-            selected['answers'].append({
-                'user': user,
-                'text': answer_text
-            })
+            questions.add_answer(selected.id, user, answer_text)
             print("Resposta registrada.")
 
         elif choice == '4':
@@ -73,24 +320,60 @@ def main():
             if not questions:
                 print("Nenhuma pergunta registrada.")
                 continue
-            ra = input("Digite o RA da pergunta para ver respostas: ").strip()
-            selected = next((q for q in questions if q['RA'] == ra), None)
+            selected = select_question(questions, "Digite o RA da pergunta para ver respostas: ")
             if not selected:
-                print("Pergunta não encontrada para o RA informado.")
                 continue
-            print(f"\nPergunta (RA {selected['RA']}): {selected['text']} (por {selected['user']})")
-            if not selected['answers']:
+            print(f"\nPergunta {selected.id} (RA {selected.ra}): {selected.text} (por {selected.user})")
+            if not selected.answers:
                 print("Nenhuma resposta para esta pergunta.")
             else:
                 print("Respostas:")
-                for i, a in enumerate(selected['answers'], start=1):
-                    print(f"{i}. ({a['user']}) {a['text']}")
+                answers = selected.answers
+
+                def answer_lines(cursor, size):
+                    # Respostas só são acrescentadas: a posição serve de cursor
+                    start = cursor or 0
+                    return [f"{i}. ({a.user}) {a.text}"
+                            for i, a in enumerate(answers[start:start + size], start=start + 1)
+                            ], (start + size if start + size < len(answers) else None)
+                paginate(len(answers), answer_lines)
 
         elif choice == '5':
             # Trocar usuário atual
             user = input("Digite o novo nome de usuário: ").strip()
             print(f"Usuário alterado para {user}.")
 
+        elif choice == '6':
+            # Busca por palavras nas perguntas e respostas, mais relevantes primeiro
+            query = input("Digite os termos da busca: ").strip()
+            results = questions.search(query)
+            if not results:
+                print("Nenhuma pergunta encontrada.")
+            else:
+                print("Resultados:")
+                for _, q in results:
+                    print(f"[{q.id}] RA {q.ra}: ({q.user}) {q.text} ({len(q.answers)} respostas)")
+
+        elif choice == '7':
+            # Perguntas que ainda precisam de ajuda, das mais antigas para as mais novas
+            waiting = questions.oldest_unanswered()
+            if not waiting:
+                print("Todas as perguntas já têm resposta.")
+            else:
+                print(f"Perguntas sem resposta ({questions.count(UNANSWERED)} no total):")
+                for q in waiting:
+                    print(f"[{q.id}] RA {q.ra}: ({q.user}) {q.text}")
+
+        elif choice == '8':
+            # Quem mais respondeu perguntas no fórum
+            top = questions.top_contributors()
+            if not top:
+                print("Nenhuma resposta registrada ainda.")
+            else:
+                print("Top colaboradores:")
+                for i, (name, count) in enumerate(top, start=1):
+                    print(f"{i}. {name} ({count} respostas)")
+
         elif choice == '0':
             # Encerrar o programa
             print("Saindo do fórum. Até mais!")
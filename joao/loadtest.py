@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+
+"""
+Teste de carga do modo servidor: centenas de clientes simulados ao mesmo tempo.
+Sobe um servidor num diretório temporário (ou usa um já rodando com --port) e
+mede requisições/s e latência p50/p99.
+Rodar com: python loadtest.py [--clients N] [--requests N] [--port P]
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import random_text
+from forum import MOST_ANSWERED, NEWEST, UNANSWERED
+from server import DEFAULT_HOST
+
+# Mistura de operações de um aluno típico: mais leitura que escrita
+MIX = (('list', 35), ('view', 20), ('answer', 15), ('search', 10), ('post', 10), ('user', 4),
+       ('unanswered', 3), ('top', 3))
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((DEFAULT_HOST, 0))
+        return s.getsockname()[1]
+
+
+def make_request(rng, client_id, posted, cursors):
+    op = rng.choices([op for op, _ in MIX], weights=[w for _, w in MIX])[0]
+    if op == 'list':
+        # Metade das listagens continua de onde a anterior (mesma ordenação) parou
+        ordering = rng.choice((NEWEST, MOST_ANSWERED, UNANSWERED))
+        cursor = cursors.get(ordering) if rng.random() < 0.5 else None
+        return {'op': op, 'ordering': ordering, 'cursor': cursor or '', 'size': 10}
+    if op == 'view':
+        return {'op': op, 'qid': rng.randint(1, max(1, posted[0]))}
+    if op == 'answer':
+        return {'op': op, 'qid': rng.randint(1, max(1, posted[0])), 'text': random_text(rng, 15)}
+    if op == 'search':
+        return {'op': op, 'query': random_text(rng, 3)}
+    if op == 'post':
+        return {'op': op, 'ra': str(client_id), 'text': random_text(rng, 12)}
+    if op == 'user':
+        return {'op': op, 'name': f'aluno{rng.randrange(1000)}'}
+    return {'op': op, 'k': 10}
+
+
+async def simulated_client(client_id, port, n_requests, latencies, posted):
+    rng = random.Random(client_id)
+    # Cursor da próxima página de cada ordenação, como o menu guarda ao paginar
+    cursors = {}
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, port)
+    for _ in range(n_requests):
+        request = make_request(rng, client_id, posted, cursors)
+        start = time.perf_counter()
+        writer.write((json.dumps(request) + '\n').encode('utf-8'))
+        await writer.drain()
+        response = json.loads(await reader.readline())
+        latencies.append(time.perf_counter() - start)
+        if request['op'] == 'post' and response['ok']:
+            posted[0] = max(posted[0], response['question']['id'])
+        elif request['op'] == 'list' and response['ok']:
+            cursors[request['ordering']] = response['cursor']
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port, n_clients, n_requests):
+    latencies = []
+    # Maior id já postado, para que as respostas e visualizações caiam em perguntas existentes
+    posted = [0]
+    start = time.perf_counter()
+    await asyncio.gather(*(simulated_client(i, port, n_requests, latencies, posted)
+                           for i in range(n_clients)))
+    return latencies, time.perf_counter() - start
+
+
+def wait_for_server(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((DEFAULT_HOST, port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor do fórum")
+    parser.add_argument('--clients', type=int, default=300)
+    parser.add_argument('--requests', type=int, default=50, help="requisições por cliente")
+    parser.add_argument('--port', type=int, help="usar um servidor já rodando nesta porta")
+    args = parser.parse_args()
+
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+        process = subprocess.Popen([sys.executable, server, '--port', str(port)],
+                                   cwd=tempfile.mkdtemp(), stdout=subprocess.DEVNULL)
+        if not wait_for_server(port):
+            process.kill()
+            print("Servidor não respondeu.")
+            return
+    try:
+        latencies, elapsed = asyncio.run(run(port, args.clients, args.requests))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    latencies.sort()
+    total = len(latencies)
+    print(f"{args.clients} clientes x {args.requests} requisições = {total} requisições")
+    print(f"  vazão: {total / elapsed:8.0f} req/s")
+    print(f"  p50  : {latencies[total // 2] * 1e3:8.2f} ms")
+    print(f"  p99  : {latencies[min(total - 1, total * 99 // 100)] * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""
+Estruturas de ranking mantidas de forma incremental para o fórum.
+"""
+
+import bisect
+
+
+class RankedCounter:
+    """
+    Chaves ordenadas por contagem decrescente numa lista só.
+    Chaves com a mesma contagem ficam contíguas (um "balde"); incrementar uma chave
+    troca ela de lugar com a primeira do seu balde e move a fronteira uma posição,
+    então o incremento é O(1) e os k primeiros são a fatia ranked[:k].
+    """
+
+    def __init__(self):
+        self.ranked = []
+        self.position = {}
+        self.counts = {}
+        # contagem -> índice do primeiro elemento do balde
+        self.first = {}
+
+    def __len__(self):
+        return len(self.ranked)
+
+    def add(self, key):
+        # Chave nova entra no fim, com contagem 0
+        self.position[key] = len(self.ranked)
+        self.ranked.append(key)
+        self.counts[key] = 0
+        self.first.setdefault(0, len(self.ranked) - 1)
+
+    def increment(self, key):
+        if key not in self.counts:
+            self.add(key)
+        count = self.counts[key]
+        here, front = self.position[key], self.first[count]
+        other = self.ranked[front]
+        self.ranked[front], self.ranked[here] = key, other
+        self.position[key], self.position[other] = front, here
+        self.counts[key] = count + 1
+        # O balde count + 1 (se existir) termina logo antes de `front`: agora inclui a chave
+        self.first.setdefault(count + 1, front)
+        if front + 1 < len(self.ranked) and self.counts[self.ranked[front + 1]] == count:
+            self.first[count] = front + 1
+        else:
+            del self.first[count]
+        return count + 1
+
+    def count(self, key):
+        return self.counts.get(key, 0)
+
+    def slice(self, start, stop):
+        return self.ranked[start:stop]
+
+    def resume(self, count, position):
+        # Onde continuar uma listagem cuja última chave mostrada tinha `count` respostas e
+        # estava em `position`: chaves que subiram acima de `count` desde então não se
+        # repetem e as de contagem menor não são puladas. O(log n)
+        def key(k):
+            return -self.counts[k]
+        higher = bisect.bisect_left(self.ranked, -count, key=key)
+        lower = bisect.bisect_right(self.ranked, -count, key=key)
+        return min(max(position + 1, higher), lower)
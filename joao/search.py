@@ -0,0 +1,86 @@
+"""
+Busca textual do fórum: índice invertido com ranking BM25.
+Cada pergunta é um documento formado pelo texto dela e das suas respostas;
+o índice é atualizado a cada postagem, sem reconstrução.
+"""
+
+import heapq
+import math
+import re
+import unicodedata
+
+K1 = 1.2
+B = 0.75
+
+TOKEN_RE = re.compile(r'\w+')
+
+# Palavras muito frequentes em português (já sem acento), que não ajudam no ranking
+STOPWORDS = frozenset("""
+a ao aos as com como da das de do dos e ela ele em entre era essa esse esta este eu
+foi ha isso isto ja mais mas me meu minha na nas nao no nos o os ou para pela pelo
+por qual quando que se sem ser seu sua so sobre tem um uma umas uns voce
+""".split())
+
+
+def fold(text):
+    # Minúsculas e sem acentos: "Função" e "funcao" viram o mesmo termo
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    return ''.join(c for c in decomposed if not unicodedata.combining(c))
+
+
+def tokenize(text):
+    return [t for t in TOKEN_RE.findall(fold(text)) if len(t) > 1 and t not in STOPWORDS]
+
+
+class SearchIndex:
+    def __init__(self):
+        # termo -> {id da pergunta: frequência do termo}
+        self.postings = {}
+        self.doc_len = {}
+        self.total_len = 0
+
+    def add(self, qid, text):
+        # Acrescenta texto ao documento da pergunta (a própria pergunta ou uma resposta)
+        tokens = tokenize(text)
+        for token in tokens:
+            docs = self.postings.get(token)
+            if docs is None:
+                docs = self.postings[token] = {}
+            docs[qid] = docs.get(qid, 0) + 1
+        self.doc_len[qid] = self.doc_len.get(qid, 0) + len(tokens)
+        self.total_len += len(tokens)
+
+    def search(self, query, k=10):
+        # Devolve [(score, id)] dos k documentos mais relevantes
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return []
+        avg_len = self.total_len / n_docs or 1
+        terms = []
+        for token in set(tokenize(query)):
+            docs = self.postings.get(token)
+            if docs:
+                idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+                terms.append((idf, docs))
+        # MaxScore: termos raros (idf alto) primeiro. Cada termo contribui no máximo
+        # idf * (K1 + 1); quando o que falta somar não alcança o k-ésimo score,
+        # os termos comuns só atualizam os candidatos, sem percorrer suas listas
+        terms.sort(key=lambda t: -t[0])
+        remaining = sum(idf for idf, _ in terms) * (K1 + 1)
+        doc_len = self.doc_len
+        scores = {}
+        candidates = None
+        for idf, docs in terms:
+            remaining -= idf * (K1 + 1)
+            if candidates is None:
+                items = docs.items()
+            else:
+                items = [(qid, docs[qid]) for qid in candidates if qid in docs]
+            for qid, tf in items:
+                norm = K1 * (1 - B + B * doc_len[qid] / avg_len)
+                scores[qid] = scores.get(qid, 0.0) + idf * tf * (K1 + 1) / (tf + norm)
+            if candidates is None and len(scores) >= k:
+                threshold = heapq.nlargest(k, scores.values())[-1]
+                if remaining < threshold:
+                    candidates = [qid for qid, score in scores.items() if score + remaining >= threshold]
+        return heapq.nlargest(k, ((score, qid) for qid, score in scores.items()))
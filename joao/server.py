@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+
+"""
+Modo servidor do fórum: vários alunos ao mesmo tempo num único quadro em memória.
+Protocolo: uma requisição JSON por linha, uma resposta JSON por linha.
+Rodar com: python server.py [--host H] [--port P] ou python server.py --unix CAMINHO
+"""
+
+import argparse
+import asyncio
+import functools
+import json
+
+from forum import DATA_BASE, MOST_ANSWERED, NEWEST, PAGE_SIZE, UNANSWERED, QuestionStore
+from storage import ForumLog
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5050
+
+
+def text_field(request, name, default=None):
+    # Valida antes de chegar ao store: apply() não pode falhar no meio de uma alteração
+    value = request[name] if default is None else request.get(name, default)
+    if not isinstance(value, str):
+        raise TypeError(f"o campo '{name}' deve ser texto")
+    return value
+
+
+def int_field(request, name, default=None):
+    value = request[name] if default is None else request.get(name, default)
+    if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+        raise TypeError(f"o campo '{name}' deve ser um inteiro não negativo")
+    return value
+
+
+def summary(q):
+    return {'id': q.id, 'ra': q.ra, 'user': q.user, 'text': q.text, 'answers': len(q.answers)}
+
+
+def detail(q):
+    result = summary(q)
+    result['answers'] = [[a.user, a.text] for a in q.answers]
+    return result
+
+
+def op_user(store, session, request):
+    # Trocar usuário: as postagens seguintes da conexão saem com este nome
+    session['user'] = text_field(request, 'name')
+    return {}
+
+
+def op_post(store, session, request):
+    question = store.add_question(text_field(request, 'ra'), text_field(request, 'user', session['user']),
+                                  text_field(request, 'text'))
+    return {'question': summary(question)}
+
+
+def op_similar(store, session, request):
+    found, _ = store.similar(text_field(request, 'text'))
+    return {'similar': [[score, summary(q)] for score, q in found]}
+
+
+def op_list(store, session, request):
+    ordering = request.get('ordering', NEWEST)
+    if ordering not in (NEWEST, MOST_ANSWERED, UNANSWERED):
+        raise ValueError(f"ordenação desconhecida: {ordering!r}")
+    # Sem cursor: primeira página; o cursor da resposta (null na última) pede a seguinte
+    page, cursor = store.page(ordering, text_field(request, 'cursor', '') or None,
+                              int_field(request, 'size', PAGE_SIZE))
+    return {'total': store.count(ordering), 'questions': [summary(q) for q in page], 'cursor': cursor}
+
+
+def op_answer(store, session, request):
+    if store.add_answer(int_field(request, 'qid'), text_field(request, 'user', session['user']),
+                        text_field(request, 'text')) is None:
+        raise LookupError("Pergunta não encontrada.")
+    return {}
+
+
+def op_view(store, session, request):
+    # Por id ou por RA (todas as perguntas do aluno), com as respostas
+    if 'ra' in request:
+        return {'questions': [detail(q) for q in store.by_ra(text_field(request, 'ra'))]}
+    question = store.get(int_field(request, 'qid'))
+    if question is None:
+        raise LookupError("Pergunta não encontrada.")
+    return {'question': detail(question)}
+
+
+def op_search(store, session, request):
+    results = store.search(text_field(request, 'query'), int_field(request, 'k', 10))
+    return {'results': [[score, summary(q)] for score, q in results]}
+
+
+def op_unanswered(store, session, request):
+    return {'questions': [summary(q) for q in store.oldest_unanswered(int_field(request, 'k', PAGE_SIZE))]}
+
+
+def op_top(store, session, request):
+    return {'top': store.top_contributors(int_field(request, 'k', PAGE_SIZE))}
+
+
+OPERATIONS = {
+    'user': op_user,
+    'post': op_post,
+    'similar': op_similar,
+    'list': op_list,
+    'answer': op_answer,
+    'view': op_view,
+    'search': op_search,
+    'unanswered': op_unanswered,
+    'top': op_top,
+}
+
+
+def dispatch(store, session, line):
+    # Cada operação roda inteira entre dois awaits: o quadro nunca é visto pela metade
+    try:
+        request = json.loads(line)
+        response = OPERATIONS[request['op']](store, session, request)
+        response['ok'] = True
+    except KeyError as e:
+        response = {'ok': False, 'error': f"Campo ou operação desconhecida: {e.args[0]}"}
+    except LookupError as e:
+        response = {'ok': False, 'error': str(e)}
+    except (ValueError, TypeError, AttributeError) as e:
+        response = {'ok': False, 'error': f"Requisição inválida: {e}"}
+    return (json.dumps(response, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+async def handle_client(store, reader, writer):
+    session = {'user': 'anônimo'}
+    try:
+        while True:
+            line = await reader.readline()
+            if not line:
+                break
+            writer.write(dispatch(store, session, line))
+            await writer.drain()
+    except (ConnectionError, ValueError):
+        # ValueError: linha maior que o limite do reader
+        pass
+    finally:
+        writer.close()
+
+
+async def serve(store, host=DEFAULT_HOST, port=DEFAULT_PORT, unix=None):
+    handler = functools.partial(handle_client, store)
+    if unix:
+        server = await asyncio.start_unix_server(handler, unix)
+        print(f"Fórum escutando em {unix}")
+    else:
+        server = await asyncio.start_server(handler, host, port)
+        print(f"Fórum escutando em {host}:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Servidor do fórum de perguntas e respostas")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="caminho de um socket Unix (em vez de TCP)")
+    args = parser.parse_args()
+
+    log = ForumLog(DATA_BASE)
+    store = QuestionStore()
+    log.load(store)
+    store.log = log
+    try:
+        asyncio.run(serve(store, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    finally:
+        log.close()
+
+
+if __name__ == "__main__":
+    main()
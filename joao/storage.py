@@ -0,0 +1,204 @@
+"""
+Persistência do fórum: log de eventos append-only (JSONL) mais snapshot periódico.
+Na inicialização carrega o snapshot e reaplica só a cauda do log gravada depois dele.
+O snapshot é escrito numa thread separada: o append só troca de arquivo de log.
+"""
+
+import json
+import os
+import threading
+
+SNAPSHOT_EVERY = 1000
+SYNC_INTERVAL = 0.05
+SYNC_BATCH = 64
+
+
+class ForumLog:
+    """
+    Cada evento recebe um número de sequência crescente. O snapshot guarda o último
+    número que já contém; ao reaplicar o log, eventos com seq menor ou igual são
+    ignorados, então uma queda entre gravar o snapshot e apagar o log antigo não
+    duplica nada.
+    Na hora do snapshot o log atual vira forum_log_old.jsonl e os eventos seguintes
+    vão para um log novo; a thread grava o snapshot e depois apaga o log antigo.
+    """
+
+    def __init__(self, base='forum', snapshot_every=SNAPSHOT_EVERY,
+                 sync_interval=SYNC_INTERVAL, sync_batch=SYNC_BATCH):
+        self.snapshot_path = base + '_snapshot.jsonl'
+        self.log_path = base + '_log.jsonl'
+        self.old_log_path = base + '_log_old.jsonl'
+        self.snapshot_every = snapshot_every
+        self.sync_interval = sync_interval
+        self.sync_batch = sync_batch
+        self.seq = 0
+        self.tail = 0
+        self.store = None
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._closed = False
+        self._syncer = None
+        self._snapshotter = None
+
+    def load(self, store):
+        # Snapshot + cauda do log; o custo é proporcional à cauda, não ao histórico
+        self.store = store
+        if os.path.exists(self.snapshot_path):
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                header = json.loads(f.readline())
+                self.seq = header['seq']
+                for line in f:
+                    q = json.loads(line)
+                    store.apply({'op': 'q', 'id': q['id'], 'ra': q['ra'],
+                                 'user': q['user'], 'text': q['text']})
+                    for user, text in q['answers']:
+                        store.apply({'op': 'a', 'qid': q['id'], 'user': user, 'text': text})
+                store.next_id = max(store.next_id, header['next_id'])
+        # O log antigo só existe se a queda foi antes de o snapshot novo ficar pronto
+        for path in (self.old_log_path, self.log_path):
+            if os.path.exists(path):
+                self._replay(path, store)
+        if os.path.exists(self.old_log_path):
+            # Completa o snapshot interrompido antes que a próxima troca de log
+            # sobrescreva o log antigo
+            self._write_snapshot(*self._snapshot_contents(), None)
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+        self._syncer = threading.Thread(target=self._sync_loop, daemon=True)
+        self._syncer.start()
+
+    def _replay(self, path, store):
+        good = 0
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    if not line.endswith(b'\n'):
+                        raise ValueError
+                    event = json.loads(line)
+                except ValueError:
+                    # Última linha truncada por uma queda no meio do append
+                    break
+                good += len(line)
+                if event['seq'] > self.seq:
+                    store.apply(event)
+                    self.seq = event['seq']
+                    self.tail += 1
+        if os.path.getsize(path) > good:
+            # Corta o pedaço incompleto; senão o próximo evento seria anexado à mesma linha
+            os.truncate(path, good)
+
+    def append(self, event):
+        # Grava no buffer do SO na hora; o fsync sai em lote (thread de sincronização)
+        with self._lock:
+            self.seq += 1
+            event['seq'] = self.seq
+            self._file.write(json.dumps(event, ensure_ascii=False) + '\n')
+            self._file.flush()
+            self._pending += 1
+            self.tail += 1
+            if self._pending >= self.sync_batch:
+                self._wake.notify()
+            if self.tail >= self.snapshot_every and self._snapshotter is None:
+                self._snapshotter = self._start_snapshot()
+                self._snapshotter.start()
+
+    def _take_pending(self):
+        # Chamado com a trava: devolve uma cópia do descritor para o fsync ser feito
+        # fora dela (a cópia continua válida mesmo se o log for trocado ou fechado)
+        if not self._pending:
+            return None
+        self._pending = 0
+        return os.dup(self._file.fileno())
+
+    @staticmethod
+    def _fsync(fd):
+        if fd is not None:
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+
+    def _sync_loop(self):
+        while True:
+            with self._lock:
+                self._wake.wait(self.sync_interval)
+                if self._closed:
+                    break
+                fd = self._take_pending()
+            self._fsync(fd)
+
+    def sync(self):
+        with self._lock:
+            fd = self._take_pending()
+        self._fsync(fd)
+
+    def _start_snapshot(self):
+        # Chamado com a trava. Só o que precisa ser consistente é feito aqui: trocar de
+        # log e guardar quais perguntas e quantas respostas de cada o snapshot inclui
+        # (perguntas nunca são removidas e respostas só são acrescentadas, então a
+        # thread pode ler os objetos vivos depois)
+        header, contents = self._snapshot_contents()
+        old_file = self._file
+        old_file.flush()
+        os.replace(self.log_path, self.old_log_path)
+        self._file = open(self.log_path, 'a', encoding='utf-8')
+        self._pending = 0
+        self.tail = 0
+        return threading.Thread(target=self._write_snapshot, args=(header, contents, old_file),
+                                daemon=True)
+
+    def _snapshot_contents(self):
+        # Cópias feitas em C (lista de referências e dict id -> nº de respostas), para
+        # não percorrer o quadro em Python enquanto segura a trava
+        return ({'seq': self.seq, 'next_id': self.store.next_id},
+                (list(self.store), self.store.answer_counts.counts.copy()))
+
+    def _write_snapshot(self, header, contents, old_file):
+        # Fora da trava: o log antigo vai ao disco antes de o snapshot substituí-lo
+        try:
+            if old_file is not None:
+                os.fsync(old_file.fileno())
+                old_file.close()
+            temp = self.snapshot_path + '.tmp'
+            with open(temp, 'w', encoding='utf-8') as f:
+                f.write(json.dumps(header) + '\n')
+                questions, answer_counts = contents
+                for q in questions:
+                    answers = q.answers[:answer_counts[q.id]]
+                    f.write(json.dumps({'id': q.id, 'ra': q.ra, 'user': q.user, 'text': q.text,
+                                        'answers': [[a.user, a.text] for a in answers]},
+                                       ensure_ascii=False) + '\n')
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp, self.snapshot_path)
+            # O snapshot já contém tudo o que estava no log antigo
+            os.remove(self.old_log_path)
+        finally:
+            with self._lock:
+                self._snapshotter = None
+
+    def snapshot(self):
+        # Snapshot imediato (espera terminar)
+        self.wait_snapshot()
+        with self._lock:
+            self._snapshotter = self._start_snapshot()
+            self._snapshotter.start()
+        self.wait_snapshot()
+
+    def wait_snapshot(self):
+        snapshotter = self._snapshotter
+        if snapshotter is not None:
+            snapshotter.join()
+
+    def close(self):
+        self.wait_snapshot()
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._wake.notify()
+            os.fsync(self._file.fileno())
+            self._pending = 0
+            self._file.close()
+        self._syncer.join()
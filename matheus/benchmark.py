@@ -0,0 +1,123 @@
+# benchmark.py
+# Mede a vazão de send_message conforme cresce o número de usuários cadastrados
+# e o custo de abrir o histórico de um chat grande (rodar com: python benchmark.py)
+
+import csv
+import gc
+import os
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from data import DataManager
+from controller import GroupController
+from models import Message
+
+
+def write_users_csv(path, n_users):
+    """Gera um CSV com n_users usuários no formato id, nome, email"""
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        csv_writer = csv.writer(file)
+        csv_writer.writerow(['id', 'nome', 'email'])
+        for i in range(1, n_users + 1):
+            csv_writer.writerow([str(i), f'Aluno {i}', f'aluno{i}@exemplo.com'])
+
+
+def bench_send_message(sizes=(1_000, 10_000, 100_000, 1_000_000), n_messages=50_000, rounds=3):
+    """Envia n_messages de um usuário do fim do arquivo (o pior caso da busca sequencial).
+    O coletor de lixo fica desligado durante a medição: suas passadas varrem todos os
+    usuários vivos e mascarariam o custo da busca; vale a melhor de `rounds` rodadas"""
+    print(f"send_message ({n_messages} mensagens por rodada):")
+    directory = tempfile.mkdtemp()
+    for n_users in sizes:
+        path = os.path.join(directory, 'users.csv')
+        write_users_csv(path, n_users)
+        controller = GroupController(DataManager(path))
+        controller.create_group('Estudos', max_users=10)
+        sender_id = str(n_users)
+        controller.add_user_to_group('Estudos', sender_id)
+        controller.select_group('Estudos')
+
+        elapsed = float('inf')
+        for _ in range(rounds):
+            gc.collect()
+            gc.disable()
+            start = time.perf_counter()
+            for i in range(n_messages):
+                controller.send_message(sender_id, f'mensagem {i}')
+            elapsed = min(elapsed, time.perf_counter() - start)
+            gc.enable()
+        print(f"  {n_users:>9} usuários: {n_messages / elapsed:10.0f} mensagens/s")
+        os.remove(path)
+
+
+def bench_large_group(sizes=(10, 1_000, 100_000), n_messages=50_000):
+    """send_message em grupos cheios: a checagem de membro não deve depender do tamanho"""
+    print(f"send_message em grupos grandes ({n_messages} mensagens):")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'users.csv')
+    write_users_csv(path, max(sizes))
+    data_manager = DataManager(path)
+    for n_members in sizes:
+        controller = GroupController(data_manager)
+        controller.create_group('Turma', max_users=n_members)
+        for i in range(1, n_members + 1):
+            controller.add_user_to_group('Turma', str(i))
+        controller.select_group('Turma')
+        sender_id = str(n_members)
+
+        gc.collect()
+        gc.disable()
+        start = time.perf_counter()
+        for i in range(n_messages):
+            controller.send_message(sender_id, f'mensagem {i}')
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        print(f"  {n_members:>9} membros : {n_messages / elapsed:10.0f} mensagens/s")
+    os.remove(path)
+
+
+def bench_history(n_messages=100_000, repeats=20):
+    """Abrir o chat lendo o histórico inteiro contra só as últimas mensagens, com o
+    log em disco; e a busca binária por data (get_messages_since)"""
+    print(f"histórico do chat ({n_messages} mensagens no disco):")
+    directory = tempfile.mkdtemp()
+    path = os.path.join(directory, 'users.csv')
+    write_users_csv(path, 10)
+    controller = GroupController(DataManager(path), os.path.join(directory, 'messages'))
+    controller.create_group('Turma')
+    controller.add_user_to_group('Turma', '1')
+    group = controller.get_group('Turma')
+    sender = controller.data_manager.get_user_by_id('1')
+    first = datetime(2024, 1, 1)
+    for i in range(n_messages):
+        group.add_message(Message(sender, f'mensagem {i}', first + timedelta(seconds=i)))
+    
+    start = time.perf_counter()
+    messages, _ = controller.get_group_messages('Turma')
+    total = sum(1 for _ in messages)
+    print(f"  histórico inteiro     : {(time.perf_counter() - start) * 1e3:9.2f} ms ({total} mensagens)")
+    
+    start = time.perf_counter()
+    for _ in range(repeats):
+        controller.get_recent_messages(group_name='Turma')
+    print(f"  últimas mensagens     : {(time.perf_counter() - start) / repeats * 1e3:9.3f} ms")
+    
+    start = time.perf_counter()
+    for cursor in range(n_messages // 2, n_messages // 2 - repeats * 1000, -1000):
+        controller.get_messages_before(cursor, group_name='Turma')
+    print(f"  página antiga (disco) : {(time.perf_counter() - start) / repeats * 1e3:9.3f} ms")
+    
+    start = time.perf_counter()
+    for i in range(repeats):
+        controller.get_messages_since(first + timedelta(seconds=i * n_messages // repeats),
+                                      limit=20, group_name='Turma')
+    print(f"  mensagens desde data  : {(time.perf_counter() - start) / repeats * 1e3:9.3f} ms")
+    controller.delete_group('Turma')
+    os.remove(path)
+
+
+if __name__ == "__main__":
+    bench_send_message()
+    bench_large_group()
+    bench_history()
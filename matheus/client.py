@@ -0,0 +1,137 @@
+# client.py
+# Cliente de terminal para o modo servidor do chat: as mensagens dos outros membros
+# aparecem enquanto você digita; os comandos são os mesmos do chat do main.py
+# (rodar com: python client.py [--host H] [--port P] [--group NOME] [--user ID] ou --unix CAMINHO)
+
+import argparse
+import asyncio
+import json
+
+from server import DEFAULT_HOST, DEFAULT_PORT, encode
+
+
+class ChatClient:
+    def __init__(self, reader, writer):
+        self.reader = reader
+        self.writer = writer
+        self.cursor = 0  # Posição da mensagem mais antiga já exibida
+    
+    async def request(self, op, **fields):
+        fields['op'] = op
+        self.writer.write(encode(fields))
+        await self.writer.drain()
+    
+    async def read_line(self):
+        line = await self.reader.readline()
+        if not line:
+            raise ConnectionError("Conexão com o servidor encerrada.")
+        return json.loads(line)
+    
+    def show_messages(self, messages):
+        for msg in messages:
+            print(f"{msg['name']}: {msg['content']}")
+    
+    def show(self, data):
+        """Exibe um evento do grupo ou a resposta de um comando"""
+        event = data.get('event')
+        if event == 'message':
+            print(f"\n{data['name']}: {data['content']}")
+        elif event == 'joined':
+            print(f"\n* {data['name']} entrou no chat")
+        elif event == 'left':
+            print(f"\n* {data['name']} saiu do chat")
+        elif not data['ok']:
+            print(f"\nErro: {data['message']}")
+        elif data['op'] == 'online':
+            print("\nUsuários online:")
+            for user in data['online']:
+                print(f"- {user['name']}")
+        elif data['op'] == 'history':
+            self.cursor = data['cursor']
+            print("\n--- Mensagens anteriores ---")
+            self.show_messages(data['history'])
+    
+    async def receive(self):
+        while True:
+            self.show(await self.read_line())
+    
+    async def join(self, group_name, user_id):
+        await self.request('join', group=group_name, user=user_id)
+        response = await self.read_line()
+        if not response['ok']:
+            print(f"\n{response['message']}")
+            return False
+        
+        self.cursor = response['cursor']
+        print("\n--- Últimas mensagens ---")
+        self.show_messages(response['history'])
+        print(f"\n{response['message']}")
+        return True
+    
+    async def type_messages(self):
+        """Lê o teclado sem bloquear o recebimento das mensagens"""
+        loop = asyncio.get_running_loop()
+        while True:
+            message_content = await loop.run_in_executor(None, input, "> ")
+            
+            if message_content.lower() == 'sair':
+                await self.request('leave')
+                return
+            elif message_content.lower() == 'usuarios':
+                await self.request('online')
+            elif message_content.lower() == 'anteriores':
+                if self.cursor == 0:
+                    print("Não há mensagens mais antigas.")
+                else:
+                    await self.request('history', before=self.cursor)
+            elif message_content.strip():
+                await self.request('send', content=message_content)
+
+
+async def run(args):
+    if args.unix:
+        reader, writer = await asyncio.open_unix_connection(args.unix)
+    else:
+        reader, writer = await asyncio.open_connection(args.host, args.port)
+    client = ChatClient(reader, writer)
+    loop = asyncio.get_running_loop()
+    
+    print("Digite 'sair' para sair do chat.")
+    print("Digite 'usuarios' para ver os usuários online.")
+    print("Digite 'anteriores' para ver mensagens mais antigas.")
+    group_name = args.group or await loop.run_in_executor(None, input, "Nome do grupo: ")
+    user_id = args.user or await loop.run_in_executor(None, input, "Digite seu ID de usuário para entrar no chat: ")
+    try:
+        if not await client.join(group_name, user_id):
+            return
+        receiving = asyncio.create_task(client.receive())
+        typing = asyncio.create_task(client.type_messages())
+        # Termina quando o usuário sai ou quando o servidor fecha a conexão
+        done, _ = await asyncio.wait({receiving, typing}, return_when=asyncio.FIRST_COMPLETED)
+        receiving.cancel()
+        for task in done:
+            if task.exception():
+                print(f"\n{task.exception()}")
+    finally:
+        writer.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cliente do chat de grupos de estudo")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="caminho de um socket Unix (em vez de TCP)")
+    parser.add_argument('--group', help="grupo em que entrar")
+    parser.add_argument('--user', help="ID do usuário")
+    args = parser.parse_args()
+    
+    try:
+        asyncio.run(run(args))
+    except OSError as e:
+        print(f"Não foi possível conectar ao servidor: {e}")
+    except (KeyboardInterrupt, EOFError):
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -2,13 +2,23 @@
 # Gerencia a lógica de negócio e controle das interações entre os modelos e a interface
 
 from models import User, Group, Message
+from message_log import SegmentedMessageLog
 from datetime import datetime
 
+HISTORY_SIZE = 20  # Mensagens exibidas por vez no histórico do chat
+
 class GroupController:
-    def __init__(self, data_manager):
+    def __init__(self, data_manager, messages_dir=None):
         self.data_manager = data_manager
         self.groups = {}  # Dicionário de grupos: {nome_do_grupo: objeto_grupo}
         self.current_group = None  # Grupo atualmente selecionado para chat
+        # Diretório dos logs de mensagens (um subdiretório por grupo); None = só memória
+        self.messages_dir = messages_dir
+    
+    def _resolve_user(self, user_id):
+        """Usuário de uma mensagem lida do disco (mesmo que tenha saído do CSV)"""
+        user = self.data_manager.get_user_by_id(user_id)
+        return user if user else User(user_id, f"Usuário {user_id}", "")
     
     def create_group(self, group_name, max_users=10):
         """Cria um novo grupo se o nome não existir"""
@@ -18,7 +28,15 @@ class GroupController:
         if not group_name or len(group_name.strip()) == 0:
             return False, "O nome do grupo não pode estar vazio"
         
-        new_group = Group(group_name, max_users)
+        message_log = None
+        if self.messages_dir:
+            # Um grupo recriado com o mesmo nome recupera o histórico gravado
+            try:
+                directory = SegmentedMessageLog.directory_for(self.messages_dir, group_name)
+            except ValueError as e:
+                return False, str(e)
+            message_log = SegmentedMessageLog(directory, self._resolve_user)
+        new_group = Group(group_name, max_users, message_log)
         self.groups[group_name] = new_group
         return True, f"Grupo '{group_name}' criado com sucesso"
     
@@ -27,7 +45,7 @@ class GroupController:
         if group_name not in self.groups:
             return False, f"Grupo '{group_name}' não encontrado"
         
-        del self.groups[group_name]
+        self.groups.pop(group_name).messages.destroy()
         
         # Se o grupo atual foi removido, desseleciona
         if self.current_group and self.current_group.name == group_name:
@@ -79,29 +97,71 @@ class GroupController:
         group = self.groups[group_name]
         return group.remove_member(user)
     
-    def send_message(self, user_id, content):
-        """Envia uma mensagem para o grupo atual"""
-        if not self.current_group:
-            return False, "Nenhum grupo selecionado"
+    def send_message(self, user_id, content, group_name=None):
+        """Envia uma mensagem para um grupo específico ou para o grupo atual"""
+        group, error = self._find_group(group_name)
+        if error:
+            return False, error
         
         user = self.data_manager.get_user_by_id(user_id)
         if not user:
             return False, f"Usuário com ID '{user_id}' não encontrado"
         
         message = Message(user, content, datetime.now())
-        return self.current_group.add_message(message)
+        return group.add_message(message)
     
-    def get_group_messages(self, group_name=None):
-        """Retorna as mensagens de um grupo específico ou do grupo atual"""
+    def get_group_messages(self, group_name=None, start=0, stop=None):
+        """Retorna um iterador sobre as mensagens (posições start a stop) de um grupo
+        específico ou do grupo atual"""
         if group_name:
             if group_name not in self.groups:
                 return None, f"Grupo '{group_name}' não encontrado"
-            return self.groups[group_name].get_messages(), None
+            return self.groups[group_name].get_messages(start, stop), None
         
         if not self.current_group:
             return None, "Nenhum grupo selecionado"
         
-        return self.current_group.get_messages(), None
+        return self.current_group.get_messages(start, stop), None
+    
+    def _find_group(self, group_name=None):
+        """Retorna (grupo, erro) para o grupo indicado ou o atual"""
+        if group_name:
+            group = self.groups.get(group_name)
+            if not group:
+                return None, f"Grupo '{group_name}' não encontrado"
+            return group, None
+        
+        if not self.current_group:
+            return None, "Nenhum grupo selecionado"
+        
+        return self.current_group, None
+    
+    def get_messages_before(self, cursor=None, limit=HISTORY_SIZE, group_name=None):
+        """Retorna ((mensagens, cursor), erro) com até limit mensagens anteriores à posição
+        cursor (None = fim do histórico). O cursor devolvido é a posição da primeira
+        mensagem da página, para pedir a página seguinte mais antiga"""
+        group, error = self._find_group(group_name)
+        if error:
+            return None, error
+        
+        stop = group.message_count() if cursor is None else min(cursor, group.message_count())
+        start = max(0, stop - limit)
+        return (list(group.get_messages(start, stop)), start), None
+    
+    def get_recent_messages(self, limit=HISTORY_SIZE, group_name=None):
+        """Retorna ((últimas limit mensagens, cursor), erro)"""
+        return self.get_messages_before(None, limit, group_name)
+    
+    def get_messages_since(self, moment, limit=None, group_name=None):
+        """Retorna ((mensagens enviadas a partir de moment, cursor), erro), até limit
+        mensagens; a posição inicial vem de uma busca binária pelo timestamp"""
+        group, error = self._find_group(group_name)
+        if error:
+            return None, error
+        
+        start = group.message_position(moment)
+        stop = None if limit is None else start + limit
+        return (list(group.get_messages(start, stop)), start), None
     
     def get_group_members(self, group_name=None):
         """Retorna os membros de um grupo específico ou do grupo atual"""
@@ -132,4 +192,9 @@ class GroupController:
         if not user:
             return False, f"Usuário com ID '{user_id}' não encontrado"
         
-        return user in group.members, None
\ No newline at end of file
+        return group.has_member(user), None
+    
+    def close(self):
+        """Fecha os logs de mensagens de todos os grupos"""
+        for group in self.groups.values():
+            group.messages.close()
\ No newline at end of file
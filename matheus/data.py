@@ -8,10 +8,37 @@ class DataManager:
     def __init__(self, csv_file_path):
         self.csv_file_path = csv_file_path
         self.users = []
+        # Índices para busca em O(1): id -> usuário, email e nome normalizados (casefold)
+        self.users_by_id = {}
+        self.users_by_email = {}
+        self.users_by_name = {}
         self.load_users()
     
+    def _clear_indexes(self):
+        """Esvazia a lista de usuários e os índices"""
+        self.users = []
+        self.users_by_id = {}
+        self.users_by_email = {}
+        self.users_by_name = {}
+    
+    def _index_user(self, user):
+        """Registra o usuário na lista e nos índices"""
+        self.users.append(user)
+        self.users_by_id[user.id] = user
+        # Em emails repetidos vale o primeiro, como na busca sequencial
+        self.users_by_email.setdefault(user.email.casefold(), user)
+        self.users_by_name.setdefault(user.name.casefold(), []).append(user)
+    
+    def add_user(self, user):
+        """Adiciona um usuário mantendo os índices atualizados"""
+        if user.id in self.users_by_id:
+            return False, f"Já existe um usuário com o ID '{user.id}'"
+        self._index_user(user)
+        return True, f"Usuário {user.name} adicionado com sucesso"
+    
     def load_users(self):
-        """Carrega os usuários do arquivo CSV"""
+        """Carrega (ou recarrega) os usuários do arquivo CSV e reconstrói os índices"""
+        self._clear_indexes()
         try:
             with open(self.csv_file_path, 'r', encoding='utf-8') as file:
                 csv_reader = csv.reader(file)
@@ -27,9 +54,9 @@ class DataManager:
                         name = row[name_idx]
                         email = row[email_idx]
                         
-                        # Cria um novo usuário e adiciona à lista
-                        user = User(user_id, name, email)
-                        self.users.append(user)
+                        # Cria um novo usuário e adiciona à lista e aos índices
+                        if user_id not in self.users_by_id:
+                            self._index_user(User(user_id, name, email))
             return True, f"Carregados {len(self.users)} usuários com sucesso"
         except FileNotFoundError:
             return False, f"Arquivo {self.csv_file_path} não encontrado"
@@ -42,22 +69,15 @@ class DataManager:
     
     def get_user_by_id(self, user_id):
         """Busca um usuário pelo ID"""
-        for user in self.users:
-            if user.id == user_id:
-                return user
-        return None
+        return self.users_by_id.get(user_id)
     
     def get_user_by_name(self, name):
         """Busca um usuário pelo nome (pode retornar múltiplos usuários)"""
-        matching_users = [user for user in self.users if user.name.lower() == name.lower()]
-        return matching_users
+        return list(self.users_by_name.get(name.casefold(), []))
     
     def get_user_by_email(self, email):
         """Busca um usuário pelo email"""
-        for user in self.users:
-            if user.email.lower() == email.lower():
-                return user
-        return None
+        return self.users_by_email.get(email.casefold())
     
     def create_sample_csv(self):
         """Cria um arquivo CSV de exemplo com alguns usuários"""
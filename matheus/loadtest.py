@@ -0,0 +1,141 @@
+# loadtest.py
+# Teste de carga do modo servidor: centenas de membros conectados ao mesmo grupo,
+# alguns deles enviando mensagens; mede mensagens/s e a latência do fan-out
+# (do envio até a chegada em cada um dos outros membros)
+# (rodar com: python loadtest.py [--clients N] [--senders N] [--messages N] [--port P])
+
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmark import write_users_csv
+from server import DEFAULT_HOST, encode
+
+GROUP_NAME = 'Carga'
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind((DEFAULT_HOST, 0))
+        return s.getsockname()[1]
+
+
+def wait_for_server(port, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection((DEFAULT_HOST, port), timeout=0.2).close()
+            return True
+        except OSError:
+            time.sleep(0.05)
+    return False
+
+
+async def simulated_member(user_id, port, joined, start, expected, n_messages, interval, latencies):
+    """Entra no grupo e recebe mensagens até chegarem as expected dos outros membros;
+    se n_messages > 0 também envia, com o instante de envio no conteúdo"""
+    reader, writer = await asyncio.open_connection(DEFAULT_HOST, port, limit=2 ** 20)
+    writer.write(encode({'op': 'join', 'group': GROUP_NAME, 'user': user_id, 'history': 0}))
+    await writer.drain()
+    response = json.loads(await reader.readline())
+    if not response['ok']:
+        raise RuntimeError(response['message'])
+    joined()
+    await start.wait()
+    
+    async def send():
+        for i in range(n_messages):
+            writer.write(encode({'op': 'send', 'content': f'{time.perf_counter()} mensagem {i}'}))
+            await writer.drain()
+            await asyncio.sleep(interval)
+    
+    sending = asyncio.create_task(send())
+    received = 0
+    while received < expected:
+        data = json.loads(await reader.readline())
+        if data.get('event') == 'message':
+            latencies.append(time.perf_counter() - float(data['content'].split()[0]))
+            received += 1
+    await sending
+    writer.close()
+    await writer.wait_closed()
+
+
+async def run(port, n_clients, n_senders, n_messages, interval):
+    latencies = []
+    start = asyncio.Event()
+    pending = [n_clients]
+    
+    def joined():
+        pending[0] -= 1
+        if pending[0] == 0:
+            start.set()
+    
+    total_sent = n_senders * n_messages
+    members = []
+    for i in range(n_clients):
+        sender = i < n_senders
+        # Quem envia não recebe as próprias mensagens
+        expected = total_sent - (n_messages if sender else 0)
+        members.append(simulated_member(str(i + 1), port, joined, start, expected,
+                                        n_messages if sender else 0, interval, latencies))
+    tasks = [asyncio.create_task(member) for member in members]
+    await start.wait()
+    began = time.perf_counter()
+    await asyncio.gather(*tasks)
+    return latencies, time.perf_counter() - began
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Teste de carga do servidor do chat")
+    parser.add_argument('--clients', type=int, default=300, help="membros conectados")
+    parser.add_argument('--senders', type=int, default=20, help="membros que enviam mensagens")
+    parser.add_argument('--messages', type=int, default=50, help="mensagens por remetente")
+    parser.add_argument('--interval', type=float, default=0.01,
+                        help="pausa entre as mensagens de um remetente (s)")
+    parser.add_argument('--port', type=int,
+                        help=f"usar um servidor já rodando nesta porta (com o grupo '{GROUP_NAME}')")
+    args = parser.parse_args()
+    senders = min(args.senders, args.clients)
+    
+    process = None
+    port = args.port
+    if port is None:
+        port = free_port()
+        directory = tempfile.mkdtemp()
+        users_path = os.path.join(directory, 'users.csv')
+        write_users_csv(users_path, args.clients)
+        server = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'server.py')
+        process = subprocess.Popen([sys.executable, server, '--port', str(port), '--users', users_path,
+                                    '--messages', os.path.join(directory, 'messages'),
+                                    '--group', GROUP_NAME],
+                                   cwd=directory, stdout=subprocess.DEVNULL)
+        if not wait_for_server(port):
+            process.kill()
+            print("Servidor não respondeu.")
+            return
+    try:
+        latencies, elapsed = asyncio.run(run(port, args.clients, senders, args.messages, args.interval))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+    
+    sent = senders * args.messages
+    latencies.sort()
+    total = len(latencies)
+    print(f"{args.clients} membros, {senders} remetentes x {args.messages} mensagens = {sent} mensagens")
+    print(f"  vazão    : {sent / elapsed:10.0f} mensagens/s enviadas, {total / elapsed:10.0f} entregas/s")
+    print(f"  fan-out p50: {latencies[total // 2] * 1e3:8.2f} ms")
+    print(f"  fan-out p99: {latencies[min(total - 1, total * 99 // 100)] * 1e3:8.2f} ms")
+    print(f"  fan-out máx: {latencies[-1] * 1e3:8.2f} ms")
+
+
+if __name__ == "__main__":
+    main()
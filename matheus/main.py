@@ -18,15 +18,21 @@ def main():
     if not os.path.exists(csv_path):
         success, message = data_manager.create_sample_csv()
         print(message)
+        if success:
+            data_manager.load_users()
     
-    # Inicializar o controlador com o gerenciador de dados
-    controller = GroupController(data_manager)
+    # Inicializar o controlador com o gerenciador de dados; o histórico de
+    # mensagens de cada grupo fica em messages/<nome do grupo>/
+    controller = GroupController(data_manager, os.path.join(script_dir, 'messages'))
     
     # Inicializar a interface do terminal
     view = TerminalView(controller)
     
     # Executar o loop principal da aplicação
-    view.run()
+    try:
+        view.run()
+    finally:
+        controller.close()
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
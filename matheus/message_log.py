@@ -0,0 +1,205 @@
+# message_log.py
+# Histórico de mensagens dos grupos: log append-only em segmentos no disco,
+# com só as mensagens mais recentes mantidas em memória
+
+import json
+import os
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict, deque
+from datetime import datetime
+from itertools import islice
+from urllib.parse import quote
+
+from models import Message
+
+SEGMENT_MAX_BYTES = 1024 * 1024
+SEGMENT_MAX_AGE = 24 * 60 * 60  # segundos
+TAIL_SIZE = 200
+CACHED_SEGMENTS = 4
+
+
+class SegmentedMessageLog:
+    """
+    Log de mensagens de um grupo dividido em segmentos (arquivos JSONL).
+    Cada segmento se chama pela posição da sua primeira mensagem; um segmento novo
+    começa quando o atual passa de max_bytes ou fica mais velho que max_age.
+    Só as últimas tail_size mensagens ficam em memória; as anteriores são lidas
+    do disco sob demanda.
+    As mensagens são gravadas em ordem de envio, então os timestamps são crescentes:
+    position_at encontra uma data por busca binária (entre segmentos e dentro deles).
+    """
+
+    def __init__(self, directory, resolve_user, max_bytes=SEGMENT_MAX_BYTES,
+                 max_age=SEGMENT_MAX_AGE, tail_size=TAIL_SIZE):
+        self.directory = directory
+        self.resolve_user = resolve_user
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.tail = deque(maxlen=tail_size)
+        # Posição e timestamp da primeira mensagem de cada segmento, em ordem
+        self.segment_starts = []
+        self.segment_times = []
+        self.total = 0
+        self._file = None
+        self._segment_bytes = 0
+        # Offsets das linhas dos segmentos lidos recentemente: {início: [offsets]}
+        self._offsets = OrderedDict()
+        os.makedirs(directory, exist_ok=True)
+        self._open()
+
+    @staticmethod
+    def directory_for(base_dir, group_name):
+        """Diretório do log de um grupo dentro de base_dir. O nome é escapado (sem '/')
+        e prefixado, para que nomes como '.' ou '..' não apontem para fora dele"""
+        directory = os.path.join(base_dir, 'grupo-' + quote(group_name, safe=''))
+        base = os.path.realpath(base_dir)
+        if os.path.dirname(os.path.realpath(directory)) != base:
+            raise ValueError(f"Nome de grupo inválido para o histórico: {group_name!r}")
+        return directory
+
+    def _segment_path(self, start):
+        return os.path.join(self.directory, f"{start:012d}.jsonl")
+
+    def _open(self):
+        """Descobre os segmentos existentes e recarrega o tail do último"""
+        self.segment_starts = sorted(int(name.split('.')[0]) for name in os.listdir(self.directory)
+                                     if name.endswith('.jsonl'))
+        if not self.segment_starts:
+            return
+        for start in self.segment_starts:
+            with open(self._segment_path(start), 'rb') as file:
+                first = file.readline()
+            # Segmento ainda vazio (criado logo antes de uma queda): vale a data do arquivo
+            self.segment_times.append(json.loads(first)['t'] if first.endswith(b'\n')
+                                      else os.path.getmtime(self._segment_path(start)))
+        last = self.segment_starts[-1]
+        offsets = self._line_offsets(last)
+        self.total = last + len(offsets) - 1
+        self._segment_bytes = offsets[-1]
+        if os.path.getsize(self._segment_path(last)) > self._segment_bytes:
+            # Descarta a linha incompleta do fim antes de voltar a anexar
+            os.truncate(self._segment_path(last), self._segment_bytes)
+        self.tail.extend(list(self.iter_range(max(0, self.total - self.tail.maxlen), self.total)))
+        self._file = open(self._segment_path(last), 'a', encoding='utf-8')
+
+    def __len__(self):
+        return self.total
+
+    def append(self, message):
+        """Grava a mensagem no segmento atual (abrindo um novo se preciso) e no tail"""
+        timestamp = (message.timestamp or datetime.now()).timestamp()
+        if (self._file is None or self._segment_bytes >= self.max_bytes
+                or timestamp - self.segment_times[-1] >= self.max_age):
+            self._roll(timestamp)
+        line = json.dumps({'t': timestamp, 'u': message.sender.id, 'c': message.content},
+                          ensure_ascii=False) + '\n'
+        self._file.write(line)
+        self._file.flush()
+        self._segment_bytes += len(line.encode('utf-8'))
+        offsets = self._offsets.get(self.segment_starts[-1])
+        if offsets is not None:
+            offsets.append(self._segment_bytes)
+        self.total += 1
+        self.tail.append(message)
+
+    def _roll(self, timestamp):
+        """Fecha o segmento atual (com fsync) e começa outro na posição atual"""
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+        self.segment_starts.append(self.total)
+        self.segment_times.append(timestamp)
+        self._file = open(self._segment_path(self.total), 'a', encoding='utf-8')
+        self._segment_bytes = 0
+        self._offsets[self.total] = [0]
+
+    def _line_offsets(self, start):
+        """Offsets de início de cada linha do segmento, com o fim da última no final"""
+        offsets = self._offsets.get(start)
+        if offsets is not None:
+            self._offsets.move_to_end(start)
+            return offsets
+        offsets = [0]
+        with open(self._segment_path(start), 'rb') as file:
+            for line in file:
+                if not line.endswith(b'\n'):
+                    # Linha incompleta (queda no meio da escrita): ignorada
+                    break
+                offsets.append(offsets[-1] + len(line))
+        self._offsets[start] = offsets
+        if len(self._offsets) > CACHED_SEGMENTS:
+            self._offsets.popitem(last=False)
+        return offsets
+
+    def _to_message(self, record):
+        return Message(self.resolve_user(record['u']), record['c'],
+                       datetime.fromtimestamp(record['t']))
+
+    def iter_range(self, start=0, stop=None):
+        """Itera as mensagens de posição start até stop (exclusivo), do tail ou do disco"""
+        stop = self.total if stop is None else min(stop, self.total)
+        position = max(start, 0)
+        while position < stop:
+            # Recalculado a cada volta: mensagens novas podem ter empurrado o tail
+            tail_start = self.total - len(self.tail)
+            if position >= tail_start:
+                yield from list(islice(self.tail, position - tail_start, stop - tail_start))
+                return
+            segment = self.segment_starts[bisect_right(self.segment_starts, position) - 1]
+            offsets = self._line_offsets(segment)
+            end = min(stop, tail_start, segment + len(offsets) - 1)
+            with open(self._segment_path(segment), 'rb') as file:
+                file.seek(offsets[position - segment])
+                messages = [self._to_message(json.loads(file.readline()))
+                            for _ in range(end - position)]
+            yield from messages
+            position = end
+
+    def position_at(self, moment):
+        """Posição da primeira mensagem enviada em moment ou depois (total se nenhuma)"""
+        timestamp = moment.timestamp()
+        if self.tail and self.tail[0].timestamp.timestamp() <= timestamp:
+            return self.total - len(self.tail) + bisect_left(
+                self.tail, timestamp, key=lambda message: message.timestamp.timestamp())
+        # Último segmento que começa antes de moment; a resposta está nele ou é o início do próximo
+        index = bisect_left(self.segment_times, timestamp) - 1
+        if index < 0:
+            return 0
+        segment = self.segment_starts[index]
+        offsets = self._line_offsets(segment)
+        low, high = 0, len(offsets) - 1
+        with open(self._segment_path(segment), 'rb') as file:
+            while low < high:
+                middle = (low + high) // 2
+                file.seek(offsets[middle])
+                if json.loads(file.readline())['t'] < timestamp:
+                    low = middle + 1
+                else:
+                    high = middle
+        return segment + low
+
+    def close(self):
+        if self._file:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self._file.close()
+            self._file = None
+
+    def destroy(self):
+        """Apaga todo o histórico do grupo: só os segmentos deste log e o diretório,
+        se ficar vazio (nunca apaga outros arquivos)"""
+        self.close()
+        for start in self.segment_starts:
+            try:
+                os.remove(self._segment_path(start))
+            except FileNotFoundError:
+                pass
+        try:
+            os.rmdir(self.directory)
+        except OSError:
+            pass
+        self.tail.clear()
+        self.segment_starts = []
+        self.segment_times = []
+        self.total = 0
@@ -1,6 +1,9 @@
 # models.py
 # Define as classes User, Group e Message para o sistema de chat de grupos de estudo
 
+from bisect import bisect_left
+from datetime import datetime
+
 class User:
     def __init__(self, id, name, email):
         self.id = id
@@ -14,57 +17,105 @@ class User:
         if not isinstance(other, User):
             return False
         return self.id == other.id
+    
+    def __hash__(self):
+        # Consistente com __eq__: usuários iguais (mesmo id) têm o mesmo hash
+        return hash(self.id)
 
 class Message:
     def __init__(self, sender, content, timestamp=None):
         self.sender = sender  # Objeto User
         self.content = content
-        self.timestamp = timestamp  # Opcional, pode ser implementado posteriormente
+        self.timestamp = timestamp  # Opcional; o grupo preenche com a hora de chegada
     
     def __str__(self):
         return f"{self.sender.name}: {self.content}"
 
+class MemoryMessageLog:
+    """Histórico só em memória (sem limite); usado quando não há diretório de mensagens.
+    Tem a mesma interface de SegmentedMessageLog (message_log.py)"""
+    
+    def __init__(self):
+        self.messages = []
+    
+    def __len__(self):
+        return len(self.messages)
+    
+    def append(self, message):
+        self.messages.append(message)
+    
+    def iter_range(self, start=0, stop=None):
+        """Itera as mensagens de posição start até stop (exclusivo)"""
+        return iter(self.messages[max(start, 0):stop])
+    
+    def position_at(self, moment):
+        """Posição da primeira mensagem enviada em moment ou depois (len se nenhuma)"""
+        return bisect_left(self.messages, moment, key=lambda message: message.timestamp)
+    
+    def close(self):
+        pass
+    
+    def destroy(self):
+        self.messages = []
+
 class Group:
-    def __init__(self, name, max_users=10):
+    def __init__(self, name, max_users=10, message_log=None):
         self.name = name
-        self.members = []  # Lista de objetos User
-        self.messages = []  # Lista de objetos Message
+        self.members = {}  # Dicionário {id: objeto User}, na ordem de entrada
+        # Histórico de mensagens: log em disco com tail em memória, ou só memória
+        self.messages = message_log if message_log is not None else MemoryMessageLog()
         self.max_users = max_users
     
     def add_member(self, user):
         """Adiciona um usuário ao grupo se ele não estiver presente e se houver espaço"""
-        if user in self.members:
+        if user.id in self.members:
             return False, "Usuário já é membro do grupo"
         
         if len(self.members) >= self.max_users:
             return False, f"O grupo atingiu o limite máximo de {self.max_users} membros"
         
-        self.members.append(user)
+        self.members[user.id] = user
         return True, f"Usuário {user.name} adicionado ao grupo {self.name}"
     
     def remove_member(self, user):
         """Remove um usuário do grupo se ele estiver presente"""
-        if user not in self.members:
+        if user.id not in self.members:
             return False, "Usuário não é membro do grupo"
         
-        self.members.remove(user)
+        del self.members[user.id]
         return True, f"Usuário {user.name} removido do grupo {self.name}"
     
     def add_message(self, message):
         """Adiciona uma mensagem ao histórico do grupo se o remetente for membro"""
-        if message.sender not in self.members:
+        if message.sender.id not in self.members:
             return False, "Apenas membros podem enviar mensagens para o grupo"
         
+        # O histórico é indexado por timestamp, então toda mensagem precisa de um
+        if message.timestamp is None:
+            message.timestamp = datetime.now()
         self.messages.append(message)
         return True, "Mensagem enviada com sucesso"
     
-    def get_messages(self):
-        """Retorna todas as mensagens do grupo"""
-        return self.messages
+    def get_messages(self, start=0, stop=None):
+        """Itera as mensagens do grupo da posição start até stop (exclusivo); sem
+        argumentos, percorre o histórico inteiro, lendo do disco só o que for usado"""
+        return self.messages.iter_range(start, stop)
+    
+    def message_count(self):
+        """Retorna o número de mensagens do grupo"""
+        return len(self.messages)
+    
+    def message_position(self, moment):
+        """Posição da primeira mensagem enviada a partir de moment (busca binária)"""
+        return self.messages.position_at(moment)
     
     def get_members(self):
         """Retorna todos os membros do grupo"""
-        return self.members
+        return list(self.members.values())
+    
+    def has_member(self, user):
+        """Verifica em O(1) se o usuário é membro do grupo"""
+        return user.id in self.members
     
     def __str__(self):
         return f"Grupo: {self.name} ({len(self.members)} membros)"
\ No newline at end of file
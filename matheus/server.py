@@ -0,0 +1,229 @@
+# server.py
+# Modo servidor do chat: vários alunos conectados ao mesmo tempo a um único
+# GroupController, recebendo em tempo real as mensagens enviadas ao grupo
+# Protocolo: uma requisição JSON por linha ({"op": ...}); cada uma recebe uma resposta
+# ({"op": ..., "ok": ...}) e os eventos do grupo chegam como {"event": ...}
+# (rodar com: python server.py [--host H] [--port P] [--group NOME] ou --unix CAMINHO)
+
+import argparse
+import asyncio
+import json
+import os
+
+from data import DataManager
+from controller import GroupController, HISTORY_SIZE
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 5060
+# Conexão que deixou acumular mais que isso sem ler é desconectada, para não
+# segurar a memória do servidor nem atrasar os outros membros
+MAX_PENDING_BYTES = 1024 * 1024
+
+
+def encode(data):
+    return (json.dumps(data, ensure_ascii=False) + '\n').encode('utf-8')
+
+
+def message_data(message, position):
+    return {'position': position, 'user': message.sender.id, 'name': message.sender.name,
+            'content': message.content, 'time': message.timestamp.timestamp()}
+
+
+class Connection:
+    def __init__(self, writer):
+        self.writer = writer
+        self.user = None  # Usuário que entrou no chat por esta conexão
+        self.group_name = None
+
+
+class ChatServer:
+    def __init__(self, controller):
+        self.controller = controller
+        # Presença por conexão: {nome_do_grupo: {conexão: usuário}}
+        self.presence = {}
+        self.operations = {
+            'join': self.op_join,
+            'send': self.op_send,
+            'online': self.op_online,
+            'history': self.op_history,
+            'leave': self.op_leave,
+        }
+    
+    def online_users(self, group_name):
+        """Usuários com pelo menos uma conexão no grupo, sem repetição"""
+        users = {}
+        for user in self.presence.get(group_name, {}).values():
+            users[user.id] = user
+        return [{'user': user.id, 'name': user.name} for user in users.values()]
+    
+    def broadcast(self, group_name, event, exclude=None):
+        """Envia o evento a todas as conexões do grupo (codificado uma vez só)"""
+        line = encode(event)
+        for connection in list(self.presence.get(group_name, {})):
+            if connection is exclude:
+                continue
+            transport = connection.writer.transport
+            if transport.is_closing():
+                # Desconectou; o handle_client ainda vai tirá-la do grupo
+                continue
+            if transport.get_write_buffer_size() > MAX_PENDING_BYTES:
+                transport.abort()
+                self.leave(connection)
+                continue
+            connection.writer.write(line)
+    
+    def leave(self, connection):
+        """Tira a conexão do grupo em que estava e avisa os outros membros"""
+        group_name = connection.group_name
+        if group_name is None:
+            return
+        members = self.presence.get(group_name, {})
+        user = members.pop(connection, None)
+        if not members:
+            self.presence.pop(group_name, None)
+        connection.group_name = None
+        if user and user not in members.values():
+            self.broadcast(group_name, {'event': 'left', 'group': group_name,
+                                        'user': user.id, 'name': user.name})
+    
+    def op_join(self, connection, request):
+        group_name, user_id = request['group'], request['user']
+        is_member, error = self.controller.user_in_group(user_id, group_name)
+        if error:
+            return False, error, {}
+        if not is_member:
+            return False, "Você não é membro deste grupo. Apenas membros podem participar do chat.", {}
+        
+        self.leave(connection)
+        user = self.controller.data_manager.get_user_by_id(user_id)
+        # Avisa só quando é a primeira conexão do usuário no grupo
+        already_online = user in self.presence.get(group_name, {}).values()
+        connection.user = user
+        connection.group_name = group_name
+        self.presence.setdefault(group_name, {})[connection] = user
+        if not already_online:
+            self.broadcast(group_name, {'event': 'joined', 'group': group_name,
+                                        'user': user.id, 'name': user.name}, exclude=connection)
+        
+        (messages, cursor), _ = self.controller.get_recent_messages(
+            request.get('history', HISTORY_SIZE), group_name)
+        return True, f"Bem-vindo(a) ao chat, {user.name}!", {
+            'history': [message_data(m, cursor + i) for i, m in enumerate(messages)],
+            'cursor': cursor,
+            'online': self.online_users(group_name),
+        }
+    
+    def op_send(self, connection, request):
+        if connection.group_name is None:
+            return False, "Entre em um grupo antes de enviar mensagens", {}
+        
+        group_name = connection.group_name
+        success, message = self.controller.send_message(connection.user.id, request['content'], group_name)
+        if not success:
+            return False, message, {}
+        
+        (sent, position), _ = self.controller.get_recent_messages(1, group_name)
+        event = {'event': 'message', 'group': group_name}
+        event.update(message_data(sent[0], position))
+        self.broadcast(group_name, event, exclude=connection)
+        return True, message, {'position': position}
+    
+    def op_online(self, connection, request):
+        group_name = request.get('group', connection.group_name)
+        if group_name is None:
+            return False, "Nenhum grupo selecionado", {}
+        return True, "", {'online': self.online_users(group_name)}
+    
+    def op_history(self, connection, request):
+        group_name = request.get('group', connection.group_name)
+        if group_name is None:
+            return False, "Nenhum grupo selecionado", {}
+        
+        history, error = self.controller.get_messages_before(
+            request.get('before'), request.get('limit', HISTORY_SIZE), group_name)
+        if error:
+            return False, error, {}
+        messages, cursor = history
+        return True, "", {'history': [message_data(m, cursor + i) for i, m in enumerate(messages)],
+                          'cursor': cursor}
+    
+    def op_leave(self, connection, request):
+        self.leave(connection)
+        return True, "Você saiu do chat", {}
+    
+    def dispatch(self, connection, line):
+        """Executa uma requisição; cada uma roda inteira entre dois awaits"""
+        op = None
+        try:
+            request = json.loads(line)
+            op = request['op']
+            success, message, data = self.operations[op](connection, request)
+        except KeyError as e:
+            success, message, data = False, f"Campo ou operação desconhecida: {e.args[0]}", {}
+        except (ValueError, TypeError, AttributeError) as e:
+            success, message, data = False, f"Requisição inválida: {e}", {}
+        
+        response = {'op': op, 'ok': success, 'message': message}
+        response.update(data)
+        return encode(response)
+    
+    async def handle_client(self, reader, writer):
+        connection = Connection(writer)
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                writer.write(self.dispatch(connection, line))
+                await writer.drain()
+        except (ConnectionError, ValueError):
+            # ValueError: linha maior que o limite do reader
+            pass
+        finally:
+            self.leave(connection)
+            writer.close()
+    
+    async def serve(self, host=DEFAULT_HOST, port=DEFAULT_PORT, unix=None):
+        if unix:
+            server = await asyncio.start_unix_server(self.handle_client, unix)
+            print(f"Chat escutando em {unix}", flush=True)
+        else:
+            server = await asyncio.start_server(self.handle_client, host, port)
+            print(f"Chat escutando em {host}:{port}", flush=True)
+        async with server:
+            await server.serve_forever()
+
+
+def main():
+    script_dir = os.path.dirname(os.path.abspath(__file__))
+    parser = argparse.ArgumentParser(description="Servidor do chat de grupos de estudo")
+    parser.add_argument('--host', default=DEFAULT_HOST)
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    parser.add_argument('--unix', help="caminho de um socket Unix (em vez de TCP)")
+    parser.add_argument('--users', default=os.path.join(script_dir, 'users.csv'),
+                        help="arquivo CSV de usuários")
+    parser.add_argument('--messages', default=os.path.join(script_dir, 'messages'),
+                        help="diretório do histórico de mensagens")
+    parser.add_argument('--group', action='append', default=[],
+                        help="cria um grupo com todos os usuários do CSV (pode repetir)")
+    args = parser.parse_args()
+    
+    data_manager = DataManager(args.users)
+    controller = GroupController(data_manager, args.messages)
+    for group_name in args.group:
+        success, message = controller.create_group(group_name, max_users=len(data_manager.users))
+        print(message)
+        if success:
+            for user in data_manager.users:
+                controller.add_user_to_group(group_name, user.id)
+    
+    try:
+        asyncio.run(ChatServer(controller).serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Servidor encerrado.")
+    finally:
+        controller.close()
+
+
+if __name__ == "__main__":
+    main()
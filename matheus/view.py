@@ -257,11 +257,14 @@ class TerminalView:
         print("Digite 'sair' para voltar ao menu anterior.")
         print("Digite 'usuarios' para ver os usuários online.")
         print("Digite 'limpar' para limpar a tela.")
-        print("\n--- Início da conversa ---")
+        print("Digite 'anteriores' para ver mensagens mais antigas.")
+        print("\n--- Últimas mensagens ---")
         
-        # Exibe mensagens anteriores
-        messages, _ = self.controller.get_group_messages(group_name)
-        if messages:
+        # Exibe só as mensagens mais recentes; as antigas vêm sob demanda
+        history, _ = self.controller.get_recent_messages(group_name=group_name)
+        cursor = 0
+        if history:
+            messages, cursor = history
             for msg in messages:
                 print(f"{msg.sender.name}: {msg.content}")
         
@@ -292,12 +295,21 @@ class TerminalView:
                 print("\nUsuários no grupo:")
                 for member in members:
                     print(f"- {member.name}")
+            elif message_content.lower() == 'anteriores':
+                if cursor == 0:
+                    print("\nNão há mensagens mais antigas.")
+                    continue
+                (messages, cursor), _ = self.controller.get_messages_before(cursor, group_name=group_name)
+                print("\n--- Mensagens anteriores ---")
+                for msg in messages:
+                    print(f"{msg.sender.name}: {msg.content}")
             elif message_content.lower() == 'limpar':
                 self.clear_screen()
                 print(f"===== CHAT DO GRUPO: {group_name} =====\n")
                 print("Digite 'sair' para voltar ao menu anterior.")
                 print("Digite 'usuarios' para ver os usuários online.")
                 print("Digite 'limpar' para limpar a tela.")
+                print("Digite 'anteriores' para ver mensagens mais antigas.")
                 print("\n--- Conversa ---")
             elif message_content.strip():
                 success, message = self.controller.send_message(user_id, message_content)